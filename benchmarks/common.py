@@ -0,0 +1,66 @@
+import json
+import math
+import statistics
+
+from config.enviro import env
+from services.role_service import RoleService
+from services.token_service import TokenService
+from services.user_service import UserService
+
+
+#Récupérer la base de données des benchmarks: un mongod local si BENCH_DATABASE_URI est défini, sinon mongomock
+def get_bench_database():
+    uri = env('BENCH_DATABASE_URI')
+    if uri:
+        import motor.motor_asyncio
+        from providers.monitoring_provider import command_stats_listener
+        #Le listener des commandes attribue les opérations MongoDB aux requêtes mesurées
+        client = motor.motor_asyncio.AsyncIOMotorClient(uri, event_listeners = [command_stats_listener])
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    return client, client[env('BENCH_DATABASE_NAME', 'api_bench')]
+
+
+#Faire pointer les services vers les collections de la base de données des benchmarks
+def bind_services(bench_db):
+    UserService._user_collection = bench_db.get_collection('users')
+    TokenService._token_collection = bench_db.get_collection('user_access_tokens')
+    TokenService._revoked_token_collection = bench_db.get_collection('user_revoked_tokens')
+    TokenService._refresh_token_collection = bench_db.get_collection('user_refresh_tokens')
+    RoleService._role_collection = bench_db.get_collection('user_roles')
+
+
+#Calculer le percentile p (0-100) d'une liste de valeurs
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+#Résumer une liste de durées (en secondes) en millisecondes
+def summarize(durations: list[float]) -> dict:
+    return {
+        'count': len(durations),
+        'mean_ms': statistics.fmean(durations) * 1000 if durations else 0.0,
+        'p50_ms': percentile(durations, 50) * 1000,
+        'p95_ms': percentile(durations, 95) * 1000,
+        'p99_ms': percentile(durations, 99) * 1000,
+    }
+
+
+#Afficher les résultats et les écrire en JSON si un chemin est fourni
+def report(results: dict, output: str = None):
+    for name, summary in results.items():
+        if not isinstance(summary, dict):
+            continue
+        print(f"{name:<40} " + "  ".join(
+            f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in summary.items()
+        ))
+    if output:
+        with open(output, 'w') as output_file:
+            json.dump(results, output_file, indent = 2)
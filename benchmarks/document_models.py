@@ -0,0 +1,70 @@
+"""
+    Benchmark de la construction des modèles à partir des documents MongoDB
+    Compare la validation Pydantic complète (Model(**document)) et la construction sans revalidation (Model.from_document)
+
+    python -m benchmarks.document_models --documents 10000,100000 --output document_models.json
+"""
+import argparse
+import time
+
+from bson import ObjectId
+
+from benchmarks.common import report
+from models.user import PartialUserModel, UserModel, UserPageModel
+
+
+#Générer des documents utilisateurs tels que retournés par le driver
+def make_documents(count: int) -> list[dict]:
+    return [
+        {
+            '_id': ObjectId(),
+            'email': f"user{i}@example.com",
+            'name': f"Name{i}",
+            'surname': f"Surname{i}",
+            'password': '$2b$12$' + 'x' * 53,
+            'roles': ['simple_user'],
+        }
+        for i in range(count)
+    ]
+
+
+#Mesurer le temps total et le temps par document d'une construction
+def measure(build, documents: list[dict]) -> dict:
+    start = time.perf_counter()
+    build(documents)
+    duration = time.perf_counter() - start
+    return {
+        'total_ms': duration * 1000,
+        'per_document_us': duration / len(documents) * 1_000_000,
+    }
+
+
+BUILDERS = {
+    'user_validate': lambda documents: [UserModel(**document) for document in documents],
+    'user_from_document': lambda documents: [UserModel.from_document(document) for document in documents],
+    'page_validate': lambda documents: UserPageModel(users = documents),
+    'page_from_document': lambda documents: UserPageModel.model_construct(
+        users = [PartialUserModel.from_document(document) for document in documents]
+    ),
+}
+
+
+def run(sizes: list[int], output: str = None):
+    results = {}
+    for size in sizes:
+        documents = make_documents(size)
+        for name, build in BUILDERS.items():
+            results[f"{name}[{size}]"] = measure(build, documents)
+    report(results, output)
+
+
+def parse_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(',') if item]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Document to model construction benchmark")
+    parser.add_argument('--documents', type = parse_list, default = [10000, 100000])
+    parser.add_argument('--output', default = None)
+    args = parser.parse_args()
+    run(args.documents, args.output)
@@ -0,0 +1,95 @@
+"""
+    Benchmark de l'encodage des réponses des endpoints de liste (GET /users/ et GET /roles/)
+    Les services sont remplacés par des données en mémoire afin de ne mesurer que la validation et la sérialisation
+
+    python -m benchmarks.list_endpoints --users 1000 --roles 100 --requests 200 --output list_endpoints.json
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from benchmarks.common import report
+from controllers import role_controller, user_controller
+from dependencies.auth import admin_role_dependency
+from models.role import RoleCollection, RoleModel
+from models.user import UserModel, UserPageModel
+from providers import response_provider
+from services.role_service import RoleService
+from services.user_service import UserService
+
+
+#Modes comparés: classe de réponse et revalidation via response_model
+MODES = {
+    'json': (JSONResponse, False),
+    'orjson': (ORJSONResponse, False),
+    'orjson+skip_validation': (ORJSONResponse, True),
+}
+
+
+def build_app(response_class) -> FastAPI:
+    app = FastAPI(default_response_class = response_class)
+    app.include_router(user_controller.router)
+    app.include_router(role_controller.router)
+    app.dependency_overrides[admin_role_dependency] = lambda: UserModel(
+        email = 'admin@example.com', name = 'Admin', surname = 'Admin', roles = ['admin']
+    )
+    return app
+
+
+#Remplacer les lectures des services par des pages construites en mémoire
+def patch_services(users: int, roles: int):
+    user_page = UserPageModel(users = [
+        {'_id': ObjectId(), 'email': f"user{i}@example.com", 'name': f"Name{i}", 'surname': f"Surname{i}", 'roles': ['simple_user']}
+        for i in range(users)
+    ])
+    role_collection = RoleCollection(roles = [
+        RoleModel(_id = ObjectId(), name = f"role{i}", description = f"Role {i}")
+        for i in range(roles)
+    ])
+    async def list_users(self, **kwargs):
+        return user_page
+    async def list_roles(self, **kwargs):
+        return role_collection
+    UserService.list_users = list_users
+    RoleService.list_roles = list_roles
+
+
+async def measure(app: FastAPI, path: str, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app = app)
+    async with httpx.AsyncClient(transport = transport, base_url = 'http://benchmark') as client:
+        (await client.get(path)).raise_for_status()
+        remaining = iter(range(requests))
+        async def worker():
+            for _ in remaining:
+                (await client.get(path)).raise_for_status()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {'requests_per_second': requests / elapsed, 'mean_latency_ms': elapsed / requests * 1000 * concurrency}
+
+
+async def run(users: int, roles: int, requests: int, concurrency: int, output: str = None):
+    patch_services(users, roles)
+    results = {'users': users, 'roles': roles, 'requests': requests, 'concurrency': concurrency}
+    for mode, (response_class, skip_validation) in MODES.items():
+        response_provider.SKIP_RESPONSE_VALIDATION = skip_validation
+        app = build_app(response_class)
+        results[f"GET /users/ {mode}"] = await measure(app, '/users/', requests, concurrency)
+        results[f"GET /roles/ {mode}"] = await measure(app, '/roles/', requests, concurrency)
+    report(results, output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "List endpoints response encoding benchmark")
+    parser.add_argument('--users', type = int, default = 1000)
+    parser.add_argument('--roles', type = int, default = 100)
+    parser.add_argument('--requests', type = int, default = 200)
+    parser.add_argument('--concurrency', type = int, default = 4)
+    parser.add_argument('--output', default = None)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.roles, args.requests, args.concurrency, args.output))
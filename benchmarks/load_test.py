@@ -0,0 +1,174 @@
+"""
+    Test de charge des endpoints d'authentification, des utilisateurs et des roles
+    L'application complète (middlewares compris) est appelée en mémoire via httpx.ASGITransport
+    Le nombre d'opérations MongoDB par requête est lu dans l'entête Server-Timing: il n'est disponible
+    qu'avec un mongod (BENCH_DATABASE_URI), mongomock ne déclenchant pas les listeners du driver
+
+    python -m benchmarks.load_test --users 10000 --roles 20 --requests 2000 --concurrency 1,10,50 --output load_test.json
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import re
+import time
+
+import httpx
+from bson import ObjectId
+
+#Valeurs par défaut permettant de lancer le benchmark sans .env
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('ALGORITHM', 'HS256')
+
+from benchmarks.common import bind_services, get_bench_database, report, summarize
+from dependencies.db_indexes import ensure_indexes
+from main import app
+from models.user import UserModel
+from providers.auth_provider import AuthProvider
+from providers.cache_provider import token_user_cache
+from providers.role_registry_provider import role_registry
+
+
+BENCH_PASSWORD = 'benchmark-password'
+
+MONGO_OPERATIONS = re.compile(r'mongo;dur=([\d.]+);desc="(\d+) ops"')
+
+
+#Insérer les roles, les utilisateurs et un jeton d'accès par utilisateur
+#Le premier utilisateur est superadmin et sert aux endpoints d'administration
+async def seed(bench_db, users: int, roles: int, chunk_size: int = 5000) -> dict:
+    for collection_name in ('users', 'user_access_tokens', 'user_roles', 'user_revoked_tokens', 'user_refresh_tokens'):
+        await bench_db.get_collection(collection_name).delete_many({})
+    await ensure_indexes(bench_db, mode = 'create')
+    role_names = [f"role{i}" for i in range(roles)]
+    await bench_db.user_roles.insert_many([
+        {'name': name, 'description': f"Benchmark role {name}"}
+        for name in [*role_names, 'admin', 'superadmin', 'simple_user']
+    ])
+    #Un seul hash au coût configuré, partagé par tous les utilisateurs
+    hashed_password = AuthProvider.hash_password(BENCH_PASSWORD)
+    seeded = {'user_ids': [], 'emails': [], 'tokens': [], 'roles': role_names}
+    for start in range(0, users, chunk_size):
+        user_docs = []
+        token_docs = []
+        for i in range(start, min(start + chunk_size, users)):
+            user = {
+                '_id': ObjectId(),
+                'email': f"user{i}@example.com",
+                'name': f"Name{i}",
+                'surname': f"Surname{i}",
+                'password': hashed_password,
+                'roles': ['admin', 'superadmin'] if i == 0 else ['simple_user'],
+            }
+            #Claims complets: les modes 'jwt' et 'refresh' reconstruisent l'utilisateur à partir du jeton
+            token = AuthProvider.create_user_access_token(AuthProvider.user_token_claims(UserModel.from_document(user)))
+            user_docs.append(user)
+            token_docs.append({
+                'token': token,
+                'user_id': user['_id'],
+                'expires_at': AuthProvider.access_token_expiry(token) or datetime.datetime.now(datetime.timezone.utc),
+            })
+            seeded['user_ids'].append(str(user['_id']))
+            seeded['emails'].append(user['email'])
+            seeded['tokens'].append(token)
+        await bench_db.users.insert_many(user_docs)
+        await bench_db.user_access_tokens.insert_many(token_docs)
+    return seeded
+
+
+#Construire les requêtes de chaque scénario: (méthode, chemin, jeton, corps JSON)
+def scenarios(seeded: dict, page_size: int) -> dict:
+    admin_token = seeded['tokens'][0]
+    def role_sample():
+        return random.sample(seeded['roles'], k = min(3, len(seeded['roles'])))
+    return {
+        'POST /login': lambda: ('POST', '/login', None, {'email': random.choice(seeded['emails']), 'password': BENCH_PASSWORD}),
+        'GET /current': lambda: ('GET', '/current', random.choice(seeded['tokens']), None),
+        'GET /users/': lambda: ('GET', f'/users/?limit={page_size}', admin_token, None),
+        'GET /roles/': lambda: ('GET', '/roles/', admin_token, None),
+        'POST /users/{id}/roles': lambda: ('POST', f"/users/{random.choice(seeded['user_ids'])}/roles", admin_token, {'roles': role_sample()}),
+        'DELETE /users/{id}/roles': lambda: ('DELETE', f"/users/{random.choice(seeded['user_ids'])}/roles", admin_token, {'roles': role_sample()}),
+    }
+
+
+#Envoyer requests requêtes d'un scénario avec concurrency clients simultanés
+async def measure(client: httpx.AsyncClient, build_request, requests: int, concurrency: int) -> dict:
+    durations = []
+    mongo_operations = []
+    mongo_durations = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, path, token, body = build_request()
+            headers = {'Authorization': f"Bearer {token}"} if token else None
+            start = time.perf_counter()
+            response = await client.request(method, path, headers = headers, json = body)
+            durations.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            match = MONGO_OPERATIONS.search(response.headers.get('server-timing', ''))
+            if match:
+                mongo_durations.append(float(match.group(1)))
+                mongo_operations.append(int(match.group(2)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests_per_second': requests / elapsed,
+        **{key: value for key, value in summarize(durations).items() if key != 'count'},
+        'db_ops_per_request': sum(mongo_operations) / len(mongo_operations) if mongo_operations else 0.0,
+        'db_ms_per_request': sum(mongo_durations) / len(mongo_durations) if mongo_durations else 0.0,
+        'errors': errors,
+    }
+
+
+async def run(
+    users: int,
+    roles: int,
+    requests: int,
+    concurrency_levels: list[int],
+    page_size: int,
+    selected: list[str] = None,
+    output: str = None
+):
+    client, bench_db = get_bench_database()
+    bind_services(bench_db)
+    seeded = await seed(bench_db, users, roles)
+    await role_registry.load(bench_db.user_roles)
+    results = {'users': users, 'roles': roles, 'requests': requests}
+    transport = httpx.ASGITransport(app = app)
+    async with httpx.AsyncClient(transport = transport, base_url = 'http://benchmark') as http_client:
+        for name, build_request in scenarios(seeded, page_size).items():
+            if selected and name not in selected:
+                continue
+            for concurrency in concurrency_levels:
+                token_user_cache.clear()
+                #Échauffement
+                await measure(http_client, build_request, min(20, requests), 1)
+                results[f"{name} c={concurrency}"] = await measure(http_client, build_request, requests, concurrency)
+    role_registry.clear()
+    role_registry.loaded = False
+    report(results, output)
+    client.close()
+
+
+def parse_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(',') if item]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Auth, users and roles endpoints load test")
+    parser.add_argument('--users', type = int, default = 10000)
+    parser.add_argument('--roles', type = int, default = 20)
+    parser.add_argument('--requests', type = int, default = 1000)
+    parser.add_argument('--concurrency', type = parse_list, default = [1, 10, 50])
+    parser.add_argument('--page-size', type = int, default = 100)
+    parser.add_argument('--scenario', action = 'append', default = None, help = "Scenario to run, e.g. 'GET /current' (repeatable)")
+    parser.add_argument('--output', default = None)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.roles, args.requests, args.concurrency, args.page_size, args.scenario, args.output))
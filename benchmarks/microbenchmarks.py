@@ -0,0 +1,94 @@
+"""
+    Microbenchmarks des fonctions coûteuses de la couche service (pytest-benchmark)
+    Chaque cas enregistre aussi ses allocations (tracemalloc) dans extra_info
+
+    python -m pytest benchmarks/microbenchmarks.py --benchmark-json microbenchmarks.json
+"""
+import os
+import tracemalloc
+
+import pytest
+from bson import ObjectId
+
+pytest.importorskip('pytest_benchmark')
+
+#Valeurs par défaut permettant de lancer les microbenchmarks sans .env
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('ALGORITHM', 'HS256')
+
+from models.user import UpdateUserModel, UserCollectionModel, UserModel
+from providers.auth_provider import AuthProvider
+from services.user_service import UserService
+
+
+def user_document(i: int) -> dict:
+    return {
+        '_id': ObjectId(),
+        'email': f"user{i}@example.com",
+        'name': f"Name{i}",
+        'surname': f"Surname{i}",
+        'password': '$2b$12$' + 'x' * 53,
+        'roles': ['simple_user'],
+    }
+
+
+#Exécuter une fois la fonction sous tracemalloc et enregistrer le pic mémoire et le nombre de blocs alloués
+def record_allocations(benchmark, fn, *args):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    differences = after.compare_to(before, 'lineno')
+    benchmark.extra_info['peak_allocated_bytes'] = peak
+    benchmark.extra_info['retained_bytes'] = sum(difference.size_diff for difference in differences)
+    benchmark.extra_info['retained_blocks'] = sum(difference.count_diff for difference in differences)
+    return result
+
+
+def test_hash_password(benchmark):
+    record_allocations(benchmark, AuthProvider.hash_password, 'benchmark-password')
+    benchmark.pedantic(AuthProvider.hash_password, args = ('benchmark-password',), rounds = 5, iterations = 1)
+
+
+def test_check_password(benchmark):
+    hashed_password = AuthProvider.hash_password('benchmark-password')
+    record_allocations(benchmark, AuthProvider.check_password, 'benchmark-password', hashed_password)
+    assert benchmark.pedantic(AuthProvider.check_password, args = ('benchmark-password', hashed_password), rounds = 5, iterations = 1)
+
+
+def test_create_user_access_token(benchmark):
+    user = UserModel.from_document(user_document(0))
+    claims = AuthProvider.user_token_claims(user)
+    record_allocations(benchmark, AuthProvider.create_user_access_token, claims)
+    benchmark(AuthProvider.create_user_access_token, claims)
+
+
+def test_user_model_validation(benchmark):
+    document = user_document(0)
+    record_allocations(benchmark, lambda: UserModel(**document))
+    benchmark(lambda: UserModel(**document))
+
+
+def test_user_model_from_document(benchmark):
+    document = user_document(0)
+    record_allocations(benchmark, UserModel.from_document, document)
+    benchmark(UserModel.from_document, document)
+
+
+@pytest.mark.parametrize('users', [1000, 10000, 100000])
+def test_user_collection_serialization(benchmark, users):
+    collection = UserCollectionModel.model_construct(users = [UserModel.from_document(user_document(i)) for i in range(users)])
+    serialize = lambda: collection.model_dump_json(by_alias = True)
+    record_allocations(benchmark, serialize)
+    benchmark.pedantic(serialize, rounds = 5 if users >= 100000 else 20, iterations = 1)
+
+
+def test_update_user_fields(benchmark):
+    user = UpdateUserModel(name = 'John', surname = 'Doe')
+    record_allocations(benchmark, UserService._update_fields, user)
+    assert benchmark(UserService._update_fields, user) == {'name': 'John', 'surname': 'Doe'}
@@ -0,0 +1,54 @@
+"""
+    Microbenchmark du coût des algorithmes de hashage de mots de passe
+    Permet de choisir BCRYPT_ROUNDS / SCRYPT_LOG_N / ARGON2_* selon le budget CPU de chaque déploiement
+
+    python -m benchmarks.password_hash --bcrypt-rounds 10,12,14 --scrypt-log-n 14,15 --iterations 10
+"""
+import argparse
+import time
+
+from benchmarks.common import report, summarize
+from providers.password_provider import Argon2Hasher, BcryptHasher, ScryptHasher, argon2
+
+
+#Mesurer le temps de hashage et de vérification d'un hasher
+def measure(hasher, iterations: int) -> dict:
+    hash_durations = []
+    verify_durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        hashed_password = hasher.hash('benchmark-password')
+        hash_durations.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        hasher.verify('benchmark-password', hashed_password)
+        verify_durations.append(time.perf_counter() - start)
+    return {
+        'hash_p50_ms': summarize(hash_durations)['p50_ms'],
+        'hash_p99_ms': summarize(hash_durations)['p99_ms'],
+        'verify_p50_ms': summarize(verify_durations)['p50_ms'],
+        'verify_p99_ms': summarize(verify_durations)['p99_ms'],
+    }
+
+
+def parse_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(',') if item]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Password hash cost benchmark")
+    parser.add_argument('--bcrypt-rounds', type = parse_list, default = [10, 12, 14])
+    parser.add_argument('--scrypt-log-n', type = parse_list, default = [14, 15, 16])
+    parser.add_argument('--argon2-memory', type = parse_list, default = [19456, 65536])
+    parser.add_argument('--iterations', type = int, default = 10)
+    parser.add_argument('--output', default = None)
+    args = parser.parse_args()
+
+    results = {}
+    for rounds in args.bcrypt_rounds:
+        results[f"bcrypt rounds={rounds}"] = measure(BcryptHasher(rounds = rounds), args.iterations)
+    for log_n in args.scrypt_log_n:
+        results[f"scrypt ln={log_n}"] = measure(ScryptHasher(log_n = log_n), args.iterations)
+    if argon2 is not None:
+        for memory_cost in args.argon2_memory:
+            results[f"argon2id m={memory_cost}"] = measure(Argon2Hasher(memory_cost = memory_cost), args.iterations)
+    report(results, args.output)
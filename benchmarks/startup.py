@@ -0,0 +1,117 @@
+"""
+    Benchmark du démarrage à froid: chaque mesure lance un nouvel interpréteur qui importe main,
+    exécute le lifespan (si une base de données est disponible) puis envoie la première requête
+    Avec BENCH_DATABASE_URI, le lifespan complet est mesuré (connexion, index, registre des roles)
+
+    python -m benchmarks.startup --runs 10 --output startup.json
+    python -m benchmarks.startup --import-profile 20
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+#Étapes mesurées dans l'interpréteur enfant
+STEPS = ('import', 'lifespan', 'first_request', 'first_openapi')
+
+
+#Mesurer un démarrage (exécuté dans l'interpréteur enfant) et écrire les durées en JSON sur la sortie standard
+def measure_startup(with_lifespan: bool):
+    start = time.perf_counter()
+    import httpx
+    import main
+    durations = {'import': time.perf_counter() - start}
+
+    async def first_requests():
+        async with contextlib.AsyncExitStack() as stack:
+            step_start = time.perf_counter()
+            if with_lifespan:
+                await stack.enter_async_context(main.app.router.lifespan_context(main.app))
+            durations['lifespan'] = time.perf_counter() - step_start
+            transport = httpx.ASGITransport(app = main.app)
+            client = await stack.enter_async_context(httpx.AsyncClient(transport = transport, base_url = 'http://benchmark'))
+            for step, path in (('first_request', '/'), ('first_openapi', '/openapi.json')):
+                step_start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                durations[step] = time.perf_counter() - step_start
+
+    asyncio.run(first_requests())
+    print(json.dumps(durations))
+
+
+#Environnement de l'interpréteur enfant: la base de données des benchmarks remplace celle du .env
+def child_environment() -> dict:
+    environ = dict(os.environ)
+    uri = environ.get('BENCH_DATABASE_URI')
+    if uri:
+        environ.update({
+            'ENV': 'test',
+            'DATABASE_URI_TEST': uri,
+            'DATABASE_NAME': environ.get('BENCH_DATABASE_NAME', 'api_bench'),
+        })
+    environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+    environ.setdefault('ALGORITHM', 'HS256')
+    return environ
+
+
+def run(runs: int, output: str = None):
+    #Importé ici pour que l'interpréteur enfant n'importe que main
+    from benchmarks.common import report, summarize
+    environ = child_environment()
+    command = [sys.executable, '-m', 'benchmarks.startup', '--child']
+    if environ.get('BENCH_DATABASE_URI'):
+        command.append('--lifespan')
+    samples = {step: [] for step in (*STEPS, 'process')}
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(command, env = environ, capture_output = True, text = True, check = True)
+        #Durée totale vue de l'extérieur, démarrage de l'interpréteur compris
+        samples['process'].append(time.perf_counter() - start)
+        durations = json.loads(completed.stdout.strip().splitlines()[-1])
+        for step in STEPS:
+            samples[step].append(durations[step])
+    results = {'runs': runs, 'with_lifespan': '--lifespan' in command}
+    results.update({step: summarize(values) for step, values in samples.items()})
+    report(results, output)
+
+
+#Afficher les modules dont l'import est le plus long (python -X importtime)
+def import_profile(top: int):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        env = child_environment(),
+        capture_output = True,
+        text = True,
+        check = True
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, module = line[len('import time:'):].split('|')
+        modules.append((int(self_time), int(cumulative_time), module.strip()))
+    print(f"{'module':<50} {'self_ms':>10} {'cumulative_ms':>14}")
+    for self_time, cumulative_time, module in sorted(modules, reverse = True)[:top]:
+        print(f"{module:<50} {self_time / 1000:>10.3f} {cumulative_time / 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Cold start benchmark: import time and time to first request")
+    parser.add_argument('--runs', type = int, default = 10)
+    parser.add_argument('--output', default = None)
+    parser.add_argument('--import-profile', type = int, default = 0, metavar = 'TOP', help = "Print the TOP slowest imports")
+    parser.add_argument('--child', action = 'store_true', help = argparse.SUPPRESS)
+    parser.add_argument('--lifespan', action = 'store_true', help = argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure_startup(args.lifespan)
+    elif args.import_profile:
+        import_profile(args.import_profile)
+    else:
+        run(args.runs, args.output)
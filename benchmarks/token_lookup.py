@@ -0,0 +1,75 @@
+"""
+    Benchmark de la résolution jeton -> utilisateur
+    Compare la stratégie 'find' (deux find_one successifs) et la stratégie 'aggregate' ($lookup)
+
+    python -m benchmarks.token_lookup --users 10000 --iterations 2000 --output token_lookup.json
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from bson import ObjectId
+
+from benchmarks.common import bind_services, get_bench_database, report, summarize
+from services.user_service import UserService
+
+
+#Insérer des utilisateurs et un jeton d'accès par utilisateur
+async def seed(bench_db, users: int, chunk_size: int = 5000) -> list[str]:
+    await bench_db.users.delete_many({})
+    await bench_db.user_access_tokens.delete_many({})
+    await bench_db.user_access_tokens.create_index('token', unique = True)
+    tokens = []
+    for start in range(0, users, chunk_size):
+        user_docs = []
+        token_docs = []
+        for i in range(start, min(start + chunk_size, users)):
+            user_id = ObjectId()
+            token = f"token-{i}-{user_id}"
+            user_docs.append({
+                '_id': user_id,
+                'email': f"user{i}@example.com",
+                'name': f"Name{i}",
+                'surname': f"Surname{i}",
+                'password': '$2b$12$' + 'x' * 53,
+                'roles': ['simple_user'],
+            })
+            token_docs.append({'token': token, 'user_id': user_id})
+            tokens.append(token)
+        await bench_db.users.insert_many(user_docs)
+        await bench_db.user_access_tokens.insert_many(token_docs)
+    return tokens
+
+
+async def run(users: int, iterations: int, output: str = None):
+    client, bench_db = get_bench_database()
+    bind_services(bench_db)
+    tokens = await seed(bench_db, users)
+    sample = [random.choice(tokens) for _ in range(iterations)]
+    strategies = {
+        'find': UserService().get_user_by_token_find,
+        'aggregate': UserService().get_user_by_token_aggregate,
+    }
+    results = {'users': users, 'iterations': iterations}
+    for name, strategy in strategies.items():
+        #Échauffement
+        for token in sample[:min(100, iterations)]:
+            await strategy(token)
+        durations = []
+        for token in sample:
+            start = time.perf_counter()
+            await strategy(token)
+            durations.append(time.perf_counter() - start)
+        results[name] = summarize(durations)
+    report(results, output)
+    client.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Token to user resolution benchmark")
+    parser.add_argument('--users', type = int, default = 10000)
+    parser.add_argument('--iterations', type = int, default = 2000)
+    parser.add_argument('--output', default = None)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.iterations, args.output))
@@ -1,16 +1,77 @@
-import motor.motor_asyncio
+import asyncio
+from typing import TYPE_CHECKING
 
-from config.enviro import env
+from config.settings import get_settings
+from providers.monitoring_provider import command_stats_listener, pool_stats_listener
 
+#motor n'est importé qu'à la création du client
+if TYPE_CHECKING:
+    import motor.motor_asyncio
 
-#Déterminer l'environnement et chosir la base de données correspondnate
-enviro = env('ENV')
-if enviro == 'production':
-    database_uri = env('DATABASE_URI_TEST')
-else:
-    database_uri = env('DATABASE_URI_PROD')
 
-#Charger le client du SGBD MongoDB avec motor
-client = motor.motor_asyncio.AsyncIOMotorClient(database_uri)
-#Récupérer la base de donnees api_concours
-db = client.api_concours
\ No newline at end of file
+#Client du SGBD MongoDB, créé au démarrage de l'application (ou au premier usage)
+_client: 'motor.motor_asyncio.AsyncIOMotorClient' = None
+_db = None
+
+
+#Options du pool de connexions et du client définies dans le .env
+def client_options() -> dict:
+    settings = get_settings()
+    options = {
+        'maxPoolSize': settings.mongo_max_pool_size,
+        'minPoolSize': settings.mongo_min_pool_size,
+        'readPreference': settings.mongo_read_preference,
+        'event_listeners': [pool_stats_listener, command_stats_listener],
+    }
+    if settings.mongo_max_idle_time_ms is not None:
+        options['maxIdleTimeMS'] = settings.mongo_max_idle_time_ms
+    if settings.mongo_wait_queue_timeout_ms is not None:
+        options['waitQueueTimeoutMS'] = settings.mongo_wait_queue_timeout_ms
+    if settings.mongo_compressors:
+        options['compressors'] = settings.mongo_compressors
+    return options
+
+
+#Récupérer le client MongoDB en le créant si nécessaire
+def get_client() -> 'motor.motor_asyncio.AsyncIOMotorClient':
+    global _client, _db
+    if _client is None:
+        import motor.motor_asyncio
+        settings = get_settings()
+        #Charger le client du SGBD MongoDB avec motor, sur la base de données de l'environnement
+        _client = motor.motor_asyncio.AsyncIOMotorClient(settings.database_uri, **client_options())
+        #Récupérer la base de donnees de l'application (api_concours par défaut)
+        _db = _client.get_database(settings.database_name)
+    return _client
+
+
+#Récupérer la base de données de l'application
+def get_database():
+    get_client()
+    return _db
+
+
+#Créer le client et ouvrir les connexions du pool avant que le worker n'accepte du trafic
+async def connect_database() -> 'motor.motor_asyncio.AsyncIOMotorClient':
+    client = get_client()
+    warm_connections = max(1, client_options()['minPoolSize'])
+    await asyncio.gather(*(client.admin.command('ping') for _ in range(warm_connections)))
+    return client
+
+
+#Fermer le client et les connexions du pool
+def close_database():
+    global _client, _db
+    if _client is not None:
+        _client.close()
+        _client = None
+        _db = None
+
+
+#Compatibilité: `from config.database import client, db` résout le client courant
+def __getattr__(name: str):
+    if name == 'client':
+        return get_client()
+    if name == 'db':
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,13 @@
+import functools
 import os
 from dotenv import load_dotenv
 
-#Charger toutes les variables d'environnement
-load_dotenv()
+#Charger toutes les variables d'environnement du .env, une seule fois
+@functools.lru_cache(maxsize = None)
+def load_environment():
+    load_dotenv()
 
 #Fonction pour récupérer une variable d'environment défini dans le .env
-def env(variable: str):
-    return os.getenv(variable)
\ No newline at end of file
+def env(variable: str, default = None):
+    load_environment()
+    return os.getenv(variable, default)
\ No newline at end of file
@@ -0,0 +1,152 @@
+import datetime
+import functools
+import os
+from typing import Any, Literal, Mapping, NamedTuple, Optional
+from pydantic import BaseModel, ConfigDict, Field, SecretStr, field_validator
+
+from config.enviro import load_environment
+
+
+class JWTKeys(NamedTuple):
+    """
+        Clés JWT préparées une seule fois: signer ou vérifier un jeton ne relit ni ne reconvertit la clé secrète
+    """
+    algorithm: str
+    signing_key: Any
+    verifying_key: Any
+
+
+class Settings(BaseModel):
+    """
+        Paramètres de l'application, lus une seule fois dans l'environnement (et le .env) puis gardés en cache
+        Chaque champ correspond à la variable d'environnement du même nom en majuscules
+        Les valeurs sont validées au chargement: une valeur invalide empêche l'application de démarrer
+    """
+    model_config = ConfigDict(frozen = True)
+
+    env: Optional[str] = None
+    database_uri_prod: Optional[str] = None
+    database_uri_test: Optional[str] = None
+    database_name: str = 'api_concours'
+
+    #Pool de connexions du client MongoDB
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_read_preference: str = 'primary'
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    #Compresseurs réseau par ordre de préférence (ex: "zstd,snappy,zlib")
+    mongo_compressors: Optional[str] = None
+    #Gestion des index au démarrage: 'create', 'rebuild' (recrée aussi les index en dérive), 'check' ou 'off'
+    index_management: Literal['create', 'rebuild', 'check', 'off'] = 'create'
+
+    #Signature des jetons d'accès
+    secret_key: Optional[SecretStr] = None
+    algorithm: Optional[str] = None
+    #Mode d'authentification et stratégie de résolution jeton -> utilisateur en mode 'opaque'
+    auth_mode: Literal['opaque', 'jwt', 'refresh'] = 'opaque'
+    token_lookup_strategy: Literal['find', 'aggregate'] = 'find'
+
+    #Durées de validité des jetons
+    access_token_expire_weeks: float = Field(30, gt = 0)
+    access_token_expire_minutes: float = Field(15, gt = 0)
+    refresh_token_expire_days: float = Field(30, gt = 0)
+    #Nombre maximal de sessions actives par utilisateur (0: illimité)
+    max_sessions_per_user: int = Field(10, ge = 0)
+
+    #Cache des utilisateurs résolus à partir de leur jeton
+    user_cache_size: int = Field(10000, ge = 0)
+    user_cache_ttl: float = Field(60, ge = 0)
+    #Intervalle (en secondes) de lecture des invalidations publiées par les autres workers (0: invalidations locales)
+    user_cache_invalidation_interval: float = Field(1, ge = 0)
+
+    #Algorithme et coût du hashage des mots de passe
+    password_hash_algorithm: Literal['bcrypt', 'scrypt', 'argon2'] = 'bcrypt'
+    bcrypt_rounds: int = Field(12, ge = 4, le = 31)
+    scrypt_log_n: int = Field(14, ge = 1)
+    scrypt_r: int = Field(8, ge = 1)
+    scrypt_p: int = Field(1, ge = 1)
+    argon2_time_cost: int = Field(3, ge = 1)
+    argon2_memory_cost: int = Field(65536, ge = 8)
+    argon2_parallelism: int = Field(4, ge = 1)
+
+    #Pool de hashage: type de workers, nombre de workers (un par CPU) et opérations admises simultanément (4 par worker)
+    hash_pool_kind: Literal['thread', 'process'] = 'thread'
+    hash_pool_size: int = Field(default_factory = lambda: os.cpu_count() or 1, ge = 1)
+    hash_pool_concurrency: Optional[int] = Field(None, ge = 1)
+
+    #Réponses JSON: classe par défaut et revalidation des modèles retournés par les services
+    response_class: Literal['orjson', 'json'] = 'orjson'
+    skip_response_validation: bool = False
+    #Histogrammes /metrics et entête Server-Timing
+    instrumentation_enabled: bool = True
+    #Endpoint /metrics: désactivé par défaut, protégé par un jeton Bearer s'il est défini
+    metrics_enabled: bool = False
+    metrics_token: Optional[SecretStr] = None
+
+    #Intervalles (en secondes) des tâches de fond (0: désactivée)
+    role_registry_poll_interval: float = Field(30, ge = 0)
+    token_maintenance_interval: float = Field(300, ge = 0)
+
+
+    #L'algorithme doit être pris en charge par PyJWT
+    @field_validator('algorithm')
+    @classmethod
+    def validate_algorithm(cls, algorithm: Optional[str]) -> Optional[str]:
+        if algorithm is not None:
+            import jwt
+            if algorithm not in jwt.algorithms.get_default_algorithms():
+                raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        return algorithm
+
+
+    #URI de la base de données correspondant à l'environnement
+    @property
+    def database_uri(self) -> Optional[str]:
+        return self.database_uri_prod if self.env == 'production' else self.database_uri_test
+
+
+    @property
+    def access_token_lifetime(self) -> datetime.timedelta:
+        return datetime.timedelta(weeks = self.access_token_expire_weeks)
+
+
+    @property
+    def short_access_token_lifetime(self) -> datetime.timedelta:
+        return datetime.timedelta(minutes = self.access_token_expire_minutes)
+
+
+    @property
+    def refresh_token_lifetime(self) -> datetime.timedelta:
+        return datetime.timedelta(days = self.refresh_token_expire_days)
+
+
+    #Clés JWT préparées au premier usage (la clé secrète peut être une clé privée PEM pour RS256/ES256)
+    @functools.cached_property
+    def jwt_keys(self) -> JWTKeys:
+        import jwt
+        if self.secret_key is None or self.algorithm is None:
+            raise ValueError("SECRET_KEY and ALGORITHM must be set to sign access tokens")
+        signing_key = jwt.get_algorithm_by_name(self.algorithm).prepare_key(self.secret_key.get_secret_value())
+        #Les algorithmes asymétriques vérifient avec la clé publique
+        verifying_key = signing_key.public_key() if hasattr(signing_key, 'public_key') else signing_key
+        return JWTKeys(self.algorithm, signing_key, verifying_key)
+
+
+    #Construire les paramètres à partir des variables d'environnement (une valeur vide vaut une variable absente)
+    @classmethod
+    def from_environ(cls, environ: Mapping[str, str] = None) -> 'Settings':
+        environ = os.environ if environ is None else environ
+        values = {}
+        for name in cls.model_fields:
+            value = environ.get(name.upper())
+            if value not in (None, ''):
+                values[name] = value
+        return cls(**values)
+
+
+#Récupérer les paramètres de l'application (construits au premier appel)
+@functools.lru_cache(maxsize = None)
+def get_settings() -> Settings:
+    load_environment()
+    return Settings.from_environ()
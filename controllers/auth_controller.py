@@ -1,11 +1,11 @@
 from typing import Annotated
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, status
 
 from dependencies.auth import auth_dependency
 from models.auth_model import AuthModel
-from models.token import AccessTokenModel
 from models.user import CreateUserModel, UpdateUserModel, UserModel
 from providers.auth_provider import AuthProvider
+from providers.response_provider import fast_response
 from services.token_service import TokenService
 from services.user_service import UserService
 
@@ -29,24 +29,15 @@ router = APIRouter(
     response_description = "Register User",      
 )
 async def register(user: CreateUserModel = Body(...)):
-    #Vérifier si l'email n'existe pas déjà dans la base de données
-    if await UserService().get_user_by_email(user.email) is not None:
-        raise HTTPException(status_code = 400, detail = "Email already exists")
-    #Stocker l'utilisateur
-    await UserService().create_user(user)
-    #Récupérer l'utilisateur et son id à partir de son email
-    new_user = await UserService().get_user_by_email(user.email)
-    #Générer le jeton d'accès
-    token = AuthProvider.create_user_access_token({'sub': user.email})
-    #Stoker le jeton d'accès
-    access_token = AccessTokenModel(token = token, user_id = new_user.id)
-    #Récupérer le document du jeton d'accès
-    await TokenService().add_access_token(access_token = access_token)
-    access_token = await TokenService().get_access_token(token)
+    #Stocker l'utilisateur (un email déjà existant est rejeté par l'index unique)
+    new_user = await UserService().create_user(user)
+    #Générer et stocker le jeton d'accès (et le jeton de rafraîchissement en mode 'refresh')
+    access_token, refresh_token = await TokenService().issue_tokens(new_user)
     #Retourner le jeton d'accès et l'utilisateur associé
     return AuthModel(
         message = "User registered successfully",
         user_acess_token = access_token,
+        refresh_token = refresh_token,
         user = new_user
     )
 
@@ -58,21 +49,48 @@ async def register(user: CreateUserModel = Body(...)):
     response_model_by_alias = True,
     response_description = "Register User",      
 )
-async def login(email: str = Body(...), password: str = Body(...)):
+async def login(background_tasks: BackgroundTasks, email: str = Body(...), password: str = Body(...)):
     user = await UserService().get_user_data_by_email(email)
     if user is  None:
         raise HTTPException(status_code = 401, detail = "Bad credentials")
-    if not AuthProvider.check_password(password, user['password']):
+    if not await AuthProvider.check_password_async(password, user['password']):
         raise HTTPException(status_code = 401, detail = "Bad credentials")
-    #Générer le jeton d'accès
-    token = AuthProvider.create_user_access_token({'sub': user['email']})
-    #Stoker le jeton d'accès
-    access_token = AccessTokenModel(token = token, user_id = user['_id'])
-    #Récupérer le document du jeton d'accès
-    await TokenService().add_access_token(access_token = access_token)
-    access_token = await TokenService().get_access_token(token)
+    #Rehasher en arrière plan un mot de passe stocké avec un algorithme ou un coût obsolète
+    if AuthProvider.password_needs_rehash(user['password']):
+        background_tasks.add_task(UserService().rehash_user_password, user['_id'], password, user['password'])
+    #Générer et stocker le jeton d'accès (et le jeton de rafraîchissement en mode 'refresh')
+    logged_user = UserModel.from_document(user)
+    access_token, refresh_token = await TokenService().issue_tokens(logged_user)
     #Retourner le jeton d'accès et l'utilisateur associé
-    return AuthModel(message = "User logged succesfully", user_acess_token = access_token, user = user)
+    return AuthModel(
+        message = "User logged succesfully",
+        user_acess_token = access_token,
+        user = logged_user,
+        refresh_token = refresh_token,
+    )
+
+
+@router.post(
+    '/token/refresh',
+    response_model = AuthModel,
+    status_code = status.HTTP_200_OK,
+    response_model_by_alias = True,
+    response_description = "Refresh the access token",      
+)
+async def refresh_access_token(refresh_token: str = Body(..., embed = True)):
+    #Échanger le jeton de rafraîchissement contre un nouveau (un jeton réutilisé révoque sa famille)
+    user_id, new_refresh_token = await TokenService().rotate_refresh_token(refresh_token)
+    #Récupérer l'utilisateur pour émettre un jeton d'accès avec ses données à jour
+    user = await UserService().get_user_by_id(user_id)
+    if user is None:
+        raise HTTPException(status_code = 401, detail = "Invalid refresh token")
+    access_token = await TokenService().issue_access_token(user)
+    return AuthModel(
+        message = "Token refreshed successfully",
+        user_acess_token = access_token,
+        user = user,
+        refresh_token = new_refresh_token,
+    )
 
 
 @router.get(
@@ -83,7 +101,7 @@ async def login(email: str = Body(...), password: str = Body(...)):
     response_description = "Get current User",      
 )
 async def get_auth_current_user(current_user: Annotated[UserModel, Depends(auth_dependency)]):
-    return current_user
+    return fast_response(current_user)
 
 
 @router.put(
@@ -101,18 +119,14 @@ async def update_current_user(
     new_user = await UserService().update_user(id = current_user.id, user = user)
     #Supprimer les jetons de l'utilisateur
     await TokenService().delete_access_token_by_user_id(new_user.id)
-    #Générer un nouveau jeton d'accès
-    token = AuthProvider.create_user_access_token({'sub': new_user['email']})
-    #Stoker le jeton d'accès
-    access_token = AccessTokenModel(token = token, user_id = new_user.id)
-    #Récupérer le document du jeton d'accès
-    await TokenService().add_access_token(access_token = access_token)
-    access_token = await TokenService().get_access_token(token)
+    #Générer et stocker un nouveau jeton d'accès (et un jeton de rafraîchissement en mode 'refresh')
+    access_token, refresh_token = await TokenService().issue_tokens(new_user)
     #Retourner le jeton d'accès et l'utilisateur associé
     return AuthModel(
         message = "User updated successfully",
         user = new_user,
         user_acess_token = access_token,
+        refresh_token = refresh_token,
     )
 
 
@@ -128,28 +142,23 @@ async def update_current_user_password(
     old_password: str = Body(...),
     new_password: str = Body(...)
 ):
-    #Récupérer l'utilisateur avec son mot de passe
-    user = await UserService().get_user_data_by_email(current_user.email)
+    #Récupérer uniquement le mot de passe de l'utilisateur
+    user = await UserService().get_user_data_by_email(current_user.email, fields = ['password'])
     #Vérifier l'ancien mot de passe
-    if not AuthProvider.check_password(old_password, user['password']):
+    if user is None or not await AuthProvider.check_password_async(old_password, user['password']):
         raise HTTPException(status_code = 401, detail = "Wrong old password")
     #Mettre à jour le password de l'utilisateur
-    user['password'] = new_password
-    new_user = await UserService().update_user(id = current_user.id, user = UpdateUserModel(**user))
+    new_user = await UserService().update_user(id = current_user.id, user = UpdateUserModel(password = new_password))
     #Supprimer les jetons de l'utilisateur
     await TokenService().delete_access_token_by_user_id(new_user.id)
-    #Générer un nouveau jeton d'accès
-    token = AuthProvider.create_user_access_token({'sub': f"{new_user['name']}{new_user.surname}",})
-    #Stoker le jeton d'accès
-    access_token = AccessTokenModel(token = token, user_id = new_user.id)
-    #Récupérer le document du jeton d'accès
-    await TokenService().add_access_token(access_token = access_token)
-    access_token = await TokenService().get_access_token(token)
+    #Générer et stocker un nouveau jeton d'accès (et un jeton de rafraîchissement en mode 'refresh')
+    access_token, refresh_token = await TokenService().issue_tokens(new_user)
     #Retourner le jeton d'accès et l'utilisateur associé
     return AuthModel(
         message = "User's password updated successfully",
         user = new_user,
         user_acess_token = access_token,
+        refresh_token = refresh_token,
     )
 
 
@@ -203,9 +212,7 @@ async def recover_current_user_password(
     response_description = "Delete account",      
 )
 async def delete(current_user: Annotated[UserModel, Depends(auth_dependency)]):
-    #Supprimer les jetons d'accès de l'utilisateur authentifié
-    await TokenService().delete_access_token_by_user_id(current_user.id)
-    #Supprimer l'utilisateur
+    #Supprimer l'utilisateur authentifié et ses jetons d'accès
     await UserService().delete_user(current_user.id)
     return {
         'message': "Account deleted successfully"
@@ -1,9 +1,10 @@
 from typing import Annotated
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 
 from dependencies.auth import admin_role_dependency, superadmin_role_dependency
 from models.role import RoleCollection, RoleModel
 from models.user import UserModel
+from providers.response_provider import fast_response
 from services.role_service import RoleService
 
 
@@ -26,8 +27,12 @@ router = APIRouter(
     response_model_by_alias = True,
     response_description = "Get all roles",
 )
-async def get_all_roles(current_user: Annotated[UserModel, Depends(admin_role_dependency)]):
-    return await RoleService().list_roles()
+async def get_all_roles(
+    current_user: Annotated[UserModel, Depends(admin_role_dependency)],
+    offset: int = Query(0, ge = 0),
+    limit: int = Query(None, ge = 1, le = 1000),
+):
+    return fast_response(await RoleService().list_roles(offset = offset, limit = limit))
 
 
 @router.post(
@@ -1,9 +1,12 @@
-from typing import Annotated
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 
 from dependencies.auth import admin_role_dependency, superadmin_role_dependency
 from models.role import AddRoleModel, AddRolesModel
-from models.user import CreateUserModel, UpdateUserModel, UserCollectionModel, UserModel
+from models.user import CreateUserModel, DeleteUsersModel, UpdateUserModel, UserModel, UserPageModel
+from providers.bulk_provider import read_csv_rows, read_ndjson_rows
+from providers.response_provider import fast_response
 from services.role_service import RoleService
 from services.token_service import TokenService
 from services.user_service import UserService
@@ -21,16 +24,123 @@ router = APIRouter(
 )
 
 
+#Paramètres de projection et de filtrage communs aux listes d'utilisateurs
+def user_list_params(
+    fields: Optional[str] = Query(None, description = "Comma separated list of fields to return"),
+    email: Optional[str] = None,
+    name: Optional[str] = None,
+    surname: Optional[str] = None,
+    role: Optional[str] = None,
+) -> dict:
+    filters = {
+        key: value
+        for key, value in {'email': email, 'name': name, 'surname': surname, 'roles': role}.items()
+        if value is not None
+    }
+    return {
+        'fields': [field.strip() for field in fields.split(',') if field.strip()] if fields else None,
+        'filters': filters,
+    }
+
+
 @router.get(
     '/',
-    response_model = UserCollectionModel,
+    response_model = UserPageModel,
     status_code = status.HTTP_200_OK,
     response_model_by_alias = True,
-    response_description = "Get all Users",      
+    response_model_exclude_unset = True,
+    response_description = "Get a page of Users",      
+)
+async def get_users(
+    current_user: UserModel = Depends(admin_role_dependency),
+    params: dict = Depends(user_list_params),
+    limit: int = Query(100, ge = 1, le = 1000),
+    cursor: Optional[str] = Query(None, alias = 'next', description = "Cursor of the next page"),
+):
+    #Récupérer puis retourner une page d'utilisateurs
+    return fast_response(
+        await UserService().list_users(limit = limit, cursor = cursor, **params),
+        exclude_unset = True
+    )
+
+
+@router.get(
+    '/stream',
+    status_code = status.HTTP_200_OK,
+    response_class = StreamingResponse,
+    response_description = "Stream all Users as NDJSON",      
+)
+async def stream_users(
+    current_user: UserModel = Depends(admin_role_dependency),
+    params: dict = Depends(user_list_params),
+    batch_size: int = Query(1000, ge = 1, le = 10000),
+):
+    return StreamingResponse(
+        UserService().stream_users(batch_size = batch_size, **params),
+        media_type = 'application/x-ndjson'
+    )
+
+
+@router.get(
+    '/export',
+    status_code = status.HTTP_200_OK,
+    response_class = StreamingResponse,
+    response_description = "Export all Users as NDJSON or CSV",      
+)
+async def export_users(
+    current_user: UserModel = Depends(admin_role_dependency),
+    params: dict = Depends(user_list_params),
+    format: Literal['ndjson', 'csv'] = Query('ndjson'),
+    batch_size: int = Query(1000, ge = 1, le = 10000),
+):
+    return StreamingResponse(
+        UserService().stream_users(batch_size = batch_size, format = format, **params),
+        media_type = 'text/csv' if format == 'csv' else 'application/x-ndjson',
+        headers = {'Content-Disposition': f'attachment; filename="users.{format}"'},
+    )
+
+
+@router.post(
+    '/bulk',
+    status_code = status.HTTP_200_OK,
+    response_description = "Import Users from a NDJSON or CSV body",      
+)
+async def import_users(
+    request: Request,
+    current_user: UserModel = Depends(admin_role_dependency),
+    chunk_size: int = Query(1000, ge = 1, le = 10000),
+):
+    #Le corps est lu en flux: un CSV (Content-Type text/csv) avec une ligne d'en-tête ou du NDJSON
+    if request.headers.get('content-type', '').startswith('text/csv'):
+        rows = read_csv_rows(request.stream())
+    else:
+        rows = read_ndjson_rows(request.stream())
+    report = await UserService().import_users(rows, chunk_size = chunk_size)
+    return {
+        'message': "Import completed",
+        **report,
+    }
+
+
+@router.post(
+    '/bulk-delete',
+    status_code = status.HTTP_200_OK,
+    response_description = "Delete Users and their access tokens by ids or by filter",      
 )
-async def get_users(current_user: UserModel = Depends(admin_role_dependency)):
-    #Récupérer puis retourner tous les utilisateurs
-    return await UserService().list_users()
+async def delete_users(
+    current_user: UserModel = Depends(admin_role_dependency),
+    request: DeleteUsersModel = Body(...),
+):
+    filters = {
+        key: value
+        for key, value in {'email': request.email, 'name': request.name, 'surname': request.surname, 'roles': request.role}.items()
+        if value is not None
+    }
+    report = await UserService().delete_users(ids = request.ids, filters = filters, transaction = request.transaction)
+    return {
+        'message': "Users deleted successfully",
+        **report,
+    }
 
 
 @router.post(
@@ -44,13 +154,8 @@ async def add_user(
     current_user: UserModel = Depends(admin_role_dependency),
     user: CreateUserModel = Body(...),
 ):
-    #Vérifier si l'email n'existe pas déjà dans la base de données
-    if await UserService().get_user_by_email(user.email) is not None:
-        raise HTTPException(status_code = 400, detail = "Email already exists")
-    #Stocker l'utilisateur
-    await UserService().create_user(user)
-    #Récupérer l'utilisateur et son id à partir de son email
-    return await UserService().get_user_by_email(user.email)
+    #Stocker puis retourner l'utilisateur (un email déjà existant est rejeté par l'index unique)
+    return await UserService().create_user(user)
 
 
 @router.get(
@@ -65,7 +170,7 @@ async def show_user(id, current_user: UserModel = Depends(admin_role_dependency)
     user = await UserService().get_user_by_id(id)
     if user is None:
         raise HTTPException(status_code = 404, detail = "User not found")
-    return user
+    return fast_response(user)
 
 
 @router.put(
@@ -96,12 +201,8 @@ async def edit_user(
     response_description = "Delete a user",
 )
 async def delete(id, current_user: UserModel = Depends(admin_role_dependency)):
-    #Récupérer l'utilisateur dont l'id se trouve dans le path parameter
-    user = await UserService().get_user_by_id(id)
-    #Supprimer les jetons d'accès de l'utilisateur
-    await TokenService().delete_access_token_by_user_id(user.id)
-    #Supprimer l'utilisateur
-    await UserService().delete_user(user.id)
+    #Supprimer l'utilisateur et ses jetons d'accès (404 si l'utilisateur n'existe pas)
+    await UserService().delete_user(id)
     return {
         'message': "User deleted successfully"
     }
@@ -138,25 +239,18 @@ async def add_roles(
     id: str,
     role_request: AddRolesModel = Body(...)
 ):
-    exists_roles = []
-    missing_roles = []
-    
-    for role in role_request.roles:
-        # Récupérer le document de rôle
-        db_role = await RoleService().get_role(role)
-        
-        # Vérifier si le rôle existe dans la base de données
-        if db_role is None:
-            missing_roles.append(role)
-        else:
-            exists_roles.append(role)
-        
+    # Vérifier en une seule requête quels rôles existent dans la base de données
+    exists_roles, missing_roles = await RoleService().get_roles_by_names(role_request.roles)
+
     # Ajouter les rôles existants à l'utilisateur
-    await UserService().add_roles_to_user(id = id, role_names = exists_roles)
+    report = {'added': [], 'already_present': []}
+    if exists_roles:
+        report = await UserService().add_roles_to_user(id = id, role_names = exists_roles)
 
     return {
         'message': "Request success",
-        'roles_added_with_success': exists_roles,
+        'roles_added_with_success': report['added'],
+        'roles_already_present': report['already_present'],
         'missing_roles': missing_roles
     }
 
@@ -194,4 +288,4 @@ async def remove_roles(
     role_request: AddRolesModel = Body(...)
 ):
     #Révoquer la liste de roles à l'utilisateur
-    return await UserService().remove_role_from_user(id = id, role_names = role_request.role)
\ No newline at end of file
+    return await UserService().remove_roles_from_user(id = id, role_names = role_request.roles)
\ No newline at end of file
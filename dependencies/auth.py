@@ -1,20 +1,31 @@
+import secrets
 from typing import Annotated, List
 from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 
+from config.settings import get_settings
 from models.user import UserModel
+from providers.metrics_provider import timed
 from services.user_service import UserService
 
 
 #Définir la dépendance de l'entête Authorization
 oauth_2_scheme = OAuth2PasswordBearer(tokenUrl = "token")
 
+#Entête Authorization du collecteur de métriques (absent: vérifié par metrics_dependency)
+metrics_scheme = HTTPBearer(auto_error = False)
+
+#Exposition de l'endpoint /metrics
+METRICS_ENABLED = get_settings().metrics_enabled
+METRICS_TOKEN = get_settings().metrics_token
+
 """
     Récupérer l'utilisateur à partir du token défini dans l'entête Authorization
     Dépendance permettant d'authenifier l'utilisateur qui envoie la requête
 """
 async def auth_dependency(token: str = Depends(oauth_2_scheme)) -> UserModel:
-    current_user = await UserService().get_user_by_token(token)
+    with timed('auth'):
+        current_user = await UserService().get_user_by_token(token)
     if current_user is None:
         raise HTTPException(401, detail = "Not authorized")
     return current_user
@@ -49,4 +60,17 @@ async def superadmin_role_dependency(current_user: UserModel = Depends(auth_depe
         # Vérifier si l'utilisateur a au moins un des rôles requis
         if any(role in current_user.roles for role in roles):
             return current_user
-    raise HTTPException(status_code = 401, detail = "Not authorized")
\ No newline at end of file
+    raise HTTPException(status_code = 401, detail = "Not authorized")
+
+
+#Dépendance de l'endpoint /metrics: introuvable s'il est désactivé, jeton Bearer exigé si METRICS_TOKEN est défini
+async def metrics_dependency(credentials: HTTPAuthorizationCredentials = Depends(metrics_scheme)):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code = 404, detail = "Not Found")
+    if METRICS_TOKEN is None:
+        return
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(),
+        METRICS_TOKEN.get_secret_value().encode()
+    ):
+        raise HTTPException(status_code = 401, detail = "Not authorized", headers = {'WWW-Authenticate': 'Bearer'})
\ No newline at end of file
@@ -1,22 +1,53 @@
 from typing import Self
-from config.database import db
+from config.database import get_database
 
 
 class DatabaseCollection():
     _instance = None
-    _db = db
+    _db = None
 
-    def __new__(cls, db) -> Self:
+    def __new__(cls, db = None) -> Self:
         if cls._instance is None:
             cls._instance = super(DatabaseCollection, cls).__new__(cls)
         cls._instance._db = db
         return cls._instance
-    
+
+    #Récupérer la base de données, par défaut celle du client créé au démarrage de l'application
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_database()
+
     #Récupérer la collection des utilisateurs
-    user_collection = _db.get_collection('users')
+    @property
+    def user_collection(self):
+        return self.db.get_collection('users')
+
     #Récupérer la collection des jetons d'accès
-    token_collection = _db.get_collection('user_access_tokens')
+    @property
+    def token_collection(self):
+        return self.db.get_collection('user_access_tokens')
+
+    #Récupérer la collection des jetons d'accès révoqués
+    @property
+    def revoked_token_collection(self):
+        return self.db.get_collection('user_revoked_tokens')
+
+    #Récupérer la collection des jetons de rafraîchissement
+    @property
+    def refresh_token_collection(self):
+        return self.db.get_collection('user_refresh_tokens')
+
+    #Récupérer la collection des invalidations du cache des utilisateurs
+    @property
+    def cache_invalidation_collection(self):
+        return self.db.get_collection('user_cache_invalidations')
+
     #Récupérer la collection des roles
-    role_collection = _db.get_collection('user_roles')
+    @property
+    def role_collection(self):
+        return self.db.get_collection('user_roles')
+
     #Récupérer la collection des permissions
-    permission_collection = _db.get_collection('user_permissions')
\ No newline at end of file
+    @property
+    def permission_collection(self):
+        return self.db.get_collection('user_permissions')
\ No newline at end of file
@@ -0,0 +1,132 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from config.settings import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+#Options d'index comparées pour détecter une dérive entre le registre et la base de données
+COMPARED_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+
+#Registre déclaratif des index de chaque collection
+INDEXES: dict[str, list[IndexModel]] = {
+    'users': [
+        IndexModel([('email', ASCENDING)], name = 'email_unique', unique = True),
+    ],
+    'user_access_tokens': [
+        IndexModel([('token', ASCENDING)], name = 'token_unique', unique = True),
+        IndexModel([('user_id', ASCENDING), ('issued_at', DESCENDING)], name = 'user_id'),
+        #Les documents sont supprimés par MongoDB dès que la date expires_at est dépassée
+        IndexModel([('expires_at', ASCENDING)], name = 'expires_at_ttl', expireAfterSeconds = 0),
+    ],
+    'user_revoked_tokens': [
+        IndexModel([('jti', ASCENDING)], name = 'jti_unique', unique = True),
+        IndexModel([('expires_at', ASCENDING)], name = 'expires_at_ttl', expireAfterSeconds = 0),
+    ],
+    'user_refresh_tokens': [
+        IndexModel([('token_hash', ASCENDING)], name = 'token_hash_unique', unique = True),
+        IndexModel([('family_id', ASCENDING)], name = 'family_id'),
+        IndexModel([('user_id', ASCENDING)], name = 'user_id'),
+        IndexModel([('expires_at', ASCENDING)], name = 'expires_at_ttl', expireAfterSeconds = 0),
+    ],
+    'user_cache_invalidations': [
+        #Les invalidations ne sont relues que quelques secondes après leur publication
+        IndexModel([('created_at', ASCENDING)], name = 'created_at_ttl', expireAfterSeconds = 600),
+    ],
+    'user_roles': [
+        IndexModel([('name', ASCENDING)], name = 'name_unique', unique = True),
+    ],
+}
+
+
+#Index dont l'application ne peut pas se passer, quel que soit INDEX_MANAGEMENT
+#email_unique est le seul contrôle des emails en double à l'inscription
+REQUIRED_INDEXES: dict[str, list[str]] = {
+    'users': ['email_unique'],
+}
+
+
+#Extraire la clé et les options comparables d'une définition d'index
+def _index_spec(index: dict) -> tuple[list, dict]:
+    key = [(field, direction) for field, direction in index['key'].items()] if isinstance(index['key'], dict) else list(index['key'])
+    return key, {option: index[option] for option in COMPARED_OPTIONS if index.get(option) is not None}
+
+
+#Comparer le registre aux index existants d'une collection
+def diff_indexes(desired: list[IndexModel], existing: dict[str, dict]) -> dict:
+    missing, drifted = [], []
+    matched_names = {'_id_'}
+    for index in desired:
+        key, options = _index_spec(index.document)
+        name = index.document['name']
+        if name not in existing:
+            #Un index de même clé peut exister sous un autre nom
+            name = next((current_name for current_name, info in existing.items() if _index_spec(info)[0] == key), None)
+        if name is None:
+            missing.append(index)
+            continue
+        matched_names.add(name)
+        if _index_spec(existing[name]) != (key, options):
+            drifted.append(index)
+    extra = [name for name in existing if name not in matched_names]
+    return {'missing': missing, 'drifted': drifted, 'extra': extra}
+
+
+#Créer les index manquants et signaler les dérives au démarrage de l'application
+#INDEX_MANAGEMENT: 'create' (par défaut), 'rebuild' (recrée aussi les index en dérive), 'check' ou 'off'
+async def ensure_indexes(db, mode: str = None) -> dict:
+    mode = mode or get_settings().index_management
+    report = {}
+    if mode == 'off':
+        return report
+    for collection_name, indexes in INDEXES.items():
+        collection = db.get_collection(collection_name)
+        try:
+            existing = await collection.index_information()
+        except Exception as e:
+            logger.error("Error while reading indexes of %s: %s", collection_name, e)
+            continue
+        diff = diff_indexes(indexes, existing)
+        for index in diff['drifted']:
+            logger.warning("Index %s.%s differs from its definition: %s", collection_name, index.document['name'], index.document)
+        for name in diff['extra']:
+            logger.info("Index %s.%s is not declared in the index registry", collection_name, name)
+        created = []
+        if mode in ('create', 'rebuild'):
+            to_create = list(diff['missing'])
+            try:
+                if mode == 'rebuild':
+                    for index in diff['drifted']:
+                        for name, info in existing.items():
+                            if name == index.document['name'] or _index_spec(info)[0] == _index_spec(index.document)[0]:
+                                await collection.drop_index(name)
+                        to_create.append(index)
+                if to_create:
+                    created = await collection.create_indexes(to_create)
+            except Exception as e:
+                logger.error("Error while creating indexes of %s: %s", collection_name, e)
+        report[collection_name] = {
+            'created': created,
+            'missing': [index.document['name'] for index in diff['missing']],
+            'drifted': [index.document['name'] for index in diff['drifted']],
+            'extra': diff['extra'],
+        }
+    return report
+
+
+#Vérifier que les index obligatoires existent avec leur définition (éventuellement sous un autre nom)
+#Lève une RuntimeError afin d'empêcher le démarrage de l'application
+async def require_indexes(db):
+    missing = []
+    for collection_name, names in REQUIRED_INDEXES.items():
+        existing = await db.get_collection(collection_name).index_information()
+        existing_specs = [_index_spec(info) for info in existing.values()]
+        for index in INDEXES[collection_name]:
+            if index.document['name'] in names and _index_spec(index.document) not in existing_specs:
+                missing.append(f"{collection_name}.{index.document['name']}")
+    if missing:
+        raise RuntimeError(f"Required indexes are missing or differ from their definition: {', '.join(missing)}")
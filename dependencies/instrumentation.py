@@ -0,0 +1,58 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from providers.metrics_provider import RequestTimings, current_timings, request_metrics
+
+
+class InstrumentationMiddleware:
+    """
+        Middleware ASGI mesurant chaque requête HTTP: latence totale, authentification, opérations MongoDB,
+        hashage et sérialisation
+        Les mesures sont ajoutées aux histogrammes par modèle de route et renvoyées dans l'entête Server-Timing
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        context_token = current_timings.set(timings)
+        status = 500
+        observed = False
+
+        #Les mesures sont enregistrées à la fin de la réponse: les BackgroundTasks exécutées ensuite
+        #(ex: rehash du mot de passe après /login) ne sont pas comptées dans la requête
+        def observe():
+            nonlocal observed
+            if observed:
+                return
+            observed = True
+            #Le modèle de route (ex: /users/{id}) est renseigné par le routeur FastAPI
+            route = scope.get('route')
+            request_metrics.observe(
+                scope['method'],
+                getattr(route, 'path', 'unmatched'),
+                status,
+                timings
+            )
+
+        async def send_with_server_timing(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', timings.server_timing().encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            current_timings.reset(context_token)
+            #Requête interrompue avant la fin de sa réponse
+            observe()
@@ -1,16 +1,60 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
 
+from config.database import close_database, connect_database, get_database
 from controllers import auth_controller, role_controller, user_controller
+from dependencies.auth import metrics_dependency
+from dependencies.db_collections import DatabaseCollection
+from dependencies.db_indexes import ensure_indexes, require_indexes
+from dependencies.instrumentation import InstrumentationMiddleware
+from providers.cache_invalidation_provider import user_cache_invalidations
+from providers.hash_pool_provider import hash_pool
+from providers.metrics_provider import INSTRUMENTATION_ENABLED, request_metrics
+from providers.monitoring_provider import command_stats_listener, pool_stats_listener
+from providers.response_provider import default_response_class
+from providers.role_registry_provider import role_registry
+from providers.token_maintenance_provider import token_maintenance
 
 
+#Initialiser les ressources de l'application au démarrage et les libérer à l'arrêt
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #Créer le client MongoDB et ouvrir les connexions du pool avant d'accepter du trafic
+    await connect_database()
+    #Créer les index des collections et signaler les dérives
+    await ensure_indexes(get_database())
+    #L'unicité des emails repose sur l'index email_unique: l'application ne démarre pas sans lui
+    await require_indexes(get_database())
+    #Charger le registre des roles et suivre ses modifications
+    await role_registry.start(DatabaseCollection().role_collection)
+    #Diffuser les invalidations du cache des utilisateurs aux autres workers
+    user_cache_invalidations.start(DatabaseCollection().cache_invalidation_collection)
+    #Suivre la taille des collections de jetons et le rythme des purges
+    token_maintenance.start(get_database())
+    yield
+    await token_maintenance.stop()
+    await user_cache_invalidations.stop()
+    await role_registry.stop()
+    #Fermer les connexions à la base de données et arrêter le pool de hashage
+    close_database()
+    hash_pool.shutdown()
+
 
 #Créer l'application avec FastAPI
 app = FastAPI(
     title="Fastapi with MongoDB quickstart",
     summary="A quickstart of a backend app using Fastapi and MongoDB.",
+    lifespan=lifespan,
+    default_response_class=default_response_class(),
 )
 
 
+#Mesurer chaque requête (histogrammes /metrics et entête Server-Timing)
+if INSTRUMENTATION_ENABLED:
+    app.add_middleware(InstrumentationMiddleware)
+
+
 app.include_router(auth_controller.router)
 app.include_router(user_controller.router)
 app.include_router(role_controller.router)
@@ -19,4 +63,16 @@ app.include_router(role_controller.router)
 #Endpoint racine
 @app.get("/")
 async def root():
-    return {"message": "Fastapi with MongoDB database quickstart!"}
\ No newline at end of file
+    return {"message": "Fastapi with MongoDB database quickstart!"}
+
+
+#Métriques au format Prometheus: histogrammes des requêtes et statistiques des pools
+#Désactivé par défaut (METRICS_ENABLED), protégé par METRICS_TOKEN
+@app.get("/metrics", response_class = PlainTextResponse, include_in_schema = False, dependencies = [Depends(metrics_dependency)])
+async def metrics():
+    gauges = {
+        **{f"mongo_pool_{name}": value for name, value in pool_stats_listener.snapshot().items()},
+        **{f"mongo_{name}": value for name, value in command_stats_listener.snapshot().items()},
+        **{f"hash_pool_{name}": value for name, value in hash_pool.metrics.snapshot().items()},
+    }
+    return PlainTextResponse(request_metrics.render(gauges), media_type = 'text/plain; version=0.0.4')
\ No newline at end of file
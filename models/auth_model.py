@@ -10,4 +10,6 @@ from models.user import UserModel
 class AuthModel(BaseModel):
     message: Optional[str] = "Success"
     user_acess_token: AccessTokenModel
-    user: UserModel
\ No newline at end of file
+    user: UserModel
+    #Jeton de rafraîchissement, retourné uniquement en mode d'authentification 'refresh'
+    refresh_token: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,43 @@
+from bson import ObjectId
+
+
+#Plan de construction de chaque modèle, calculé une seule fois: (nom du champ, clé du document, champ)
+_document_plans: dict[type, list[tuple]] = {}
+
+
+#Mixin de construction d'un modèle à partir d'un document lu dans nos propres collections
+class DocumentModelMixin:
+
+    @classmethod
+    def _document_plan(cls) -> list[tuple]:
+        plan = _document_plans.get(cls)
+        if plan is None:
+            plan = _document_plans[cls] = [(name, field.alias or name, field) for name, field in cls.model_fields.items()]
+        return plan
+
+
+    #Projection MongoDB limitée aux champs du modèle (l'_id est toujours retourné par MongoDB)
+    @classmethod
+    def document_projection(cls, *extra_fields: str) -> dict:
+        projection = {key: 1 for _, key, _ in cls._document_plan() if key != '_id'}
+        projection.update({field: 1 for field in extra_fields})
+        return projection
+
+
+    #Construire le modèle sans revalidation (documents de confiance uniquement)
+    #Les ObjectId sont convertis en str et les clés inconnues du modèle (ex: password) sont ignorées
+    #Comme pour model_construct, seuls les champs présents dans le document sont marqués comme définis
+    @classmethod
+    def from_document(cls, document: dict):
+        values = {}
+        missing = []
+        for name, key, field in cls._document_plan():
+            if key in document:
+                value = document[key]
+                values[name] = str(value) if value.__class__ is ObjectId else value
+            elif field.is_required():
+                missing.append(key)
+        if missing:
+            raise ValueError(f"{cls.__name__} document is missing required fields: {', '.join(missing)}")
+        #model_construct complète les valeurs par défaut des champs absents
+        return cls.model_construct(_fields_set = set(values), **values)
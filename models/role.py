@@ -2,12 +2,14 @@ from typing import Annotated, List, Optional
 from bson import ObjectId
 from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
 
+from models.document import DocumentModelMixin
+
 
 PyObjectId = Annotated[str, BeforeValidator(str)]
 
 
 #Model d'un document role
-class RoleModel(BaseModel):
+class RoleModel(DocumentModelMixin, BaseModel):
     id: Optional[PyObjectId] = Field(alias = '_id', default = None)
     name: str = Field(...)
     description: str = Field(...)
@@ -51,4 +53,4 @@ class AddRoleModel(BaseModel):
 
 #Model d'ajout/suppression d'une liste de roles à un Utilisateur
 class AddRolesModel(BaseModel):
-    roles: str = Field(...)
\ No newline at end of file
+    roles: List[str] = Field(...)
\ No newline at end of file
@@ -1,16 +1,23 @@
+import datetime
 from typing import Annotated, Optional
 from bson import ObjectId
 from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
 
+from models.document import DocumentModelMixin
+
 
 PyObcjectId = Annotated[str, BeforeValidator(str)]
 
 
 #Model de base de stokage d'un jeton d'accès
-class AccessTokenModel(BaseModel):
+class AccessTokenModel(DocumentModelMixin, BaseModel):
     id: Optional[PyObcjectId] = Field(alias = '_id', default = None)
     token: str = Field(...)
     user_id: PyObcjectId = Field(...)
+    #Date d'expiration du jeton: le document est supprimé par l'index TTL expires_at_ttl
+    expires_at: Optional[datetime.datetime] = None
+    #Date d'émission du jeton: ordre d'éviction des sessions (index user_id)
+    issued_at: Optional[datetime.datetime] = None
     model_config = ConfigDict(
         populate_by_name = True,
         arbitrary_types_allowed = True,
@@ -3,12 +3,14 @@ from typing import Annotated, List, Optional
 from bson import ObjectId
 from pydantic import BaseModel, BeforeValidator, ConfigDict, EmailStr, Field
 
+from models.document import DocumentModelMixin
+
 
 PyObjectId = Annotated[str, BeforeValidator(str)]
 
 
 #Model de base d'un utilisateur
-class UserModel(BaseModel):
+class UserModel(DocumentModelMixin, BaseModel):
     id: Optional[PyObjectId] = Field(alias='_id', default=None)
     email: EmailStr = Field(...)
     name: str = Field(...)
@@ -56,4 +58,37 @@ class UpdateUserModel(BaseModel):
 
 #Model de liste des utilisateurs
 class UserCollectionModel(BaseModel):
-    users: List[UserModel]
\ No newline at end of file
+    users: List[UserModel]
+
+
+#Model d'un utilisateur dont seuls certains champs ont été projetés
+class PartialUserModel(DocumentModelMixin, BaseModel):
+    id: Optional[PyObjectId] = Field(alias='_id', default=None)
+    email: Optional[str] = None
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    roles: Optional[List[str]] = None
+
+
+#Model d'une page de la liste des utilisateurs avec le curseur de la page suivante
+class UserPageModel(BaseModel):
+    users: List[PartialUserModel]
+    next: Optional[str] = None
+
+
+#Model de suppression groupée d'utilisateurs par liste d'id ou par filtre
+class DeleteUsersModel(BaseModel):
+    ids: Optional[List[str]] = None
+    email: Optional[str] = None
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    role: Optional[str] = None
+    transaction: bool = False
+    model_config = ConfigDict(
+        json_schema_extra = {
+            'example': {
+                'ids': ['60d5ec49a4b4c3e7b4f4e3b2'],
+                'transaction': False
+            }
+        }
+    )
\ No newline at end of file
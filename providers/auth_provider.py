@@ -1,10 +1,30 @@
 import datetime
+import hashlib
+import secrets
 from typing import Self
-import bcrypt
+import uuid
 from fastapi import HTTPException
 import jwt
 
-from config.enviro import env
+from config.settings import get_settings
+from models.user import UserModel
+from providers.hash_pool_provider import hash_pool
+from providers import password_provider
+
+
+#Mode d'authentification: 'opaque' (jeton vérifié dans la collection des jetons), 'jwt' (jeton vérifié localement)
+#ou 'refresh' (jeton d'accès de courte durée vérifié localement, renouvelé par un jeton de rafraîchissement)
+AUTH_MODE = get_settings().auth_mode
+
+#Durée de validité d'un jeton d'accès
+ACCESS_TOKEN_LIFETIME = get_settings().access_token_lifetime
+
+#Durées de validité des jetons d'accès et des jetons de rafraîchissement en mode 'refresh'
+SHORT_ACCESS_TOKEN_LIFETIME = get_settings().short_access_token_lifetime
+REFRESH_TOKEN_LIFETIME = get_settings().refresh_token_lifetime
+
+#Claims obligatoires d'un jeton d'accès
+ACCESS_TOKEN_DECODE_OPTIONS = {'require': ['sub', 'uid', 'jti', 'exp']}
 
 
 class AuthProvider:
@@ -19,15 +39,73 @@ class AuthProvider:
     #Générer un jeton d'accès
     def create_user_access_token(data: dict, expires_delta: datetime.timedelta = None) -> str:
         try:
-            return jwt.encode(data, env('SECRET_KEY'), algorithm=env('ALGORITHM'))
+            now = datetime.datetime.now(datetime.timezone.utc)
+            if expires_delta is None:
+                expires_delta = ACCESS_TOKEN_LIFETIME
+            payload = {'jti': uuid.uuid4().hex, 'iat': now, 'exp': now + expires_delta, **data}
+            #Clé de signature préparée une seule fois à partir des paramètres
+            jwt_keys = get_settings().jwt_keys
+            return jwt.encode(payload, jwt_keys.signing_key, algorithm = jwt_keys.algorithm)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error creating access token: {str(e)}")
 
 
+    #Construire les claims d'un jeton d'accès permettant de reconstruire l'utilisateur sans la base de données
+    def user_token_claims(user: UserModel) -> dict:
+        return {
+            'sub': user.email,
+            'uid': str(user.id),
+            'name': user.name,
+            'surname': user.surname,
+            'roles': user.roles,
+        }
+
+
+    #Vérifier la signature et l'expiration d'un jeton d'accès puis retourner ses claims, None si le jeton est invalide
+    def decode_user_access_token(token: str) -> dict:
+        jwt_keys = get_settings().jwt_keys
+        try:
+            return jwt.decode(
+                token,
+                jwt_keys.verifying_key,
+                algorithms = [jwt_keys.algorithm],
+                options = ACCESS_TOKEN_DECODE_OPTIONS,
+            )
+        except jwt.PyJWTError:
+            return None
+
+
+    #Lire les claims d'un jeton d'accès sans vérification (pour récupérer jti et exp d'un jeton à révoquer)
+    def read_user_access_token(token: str) -> dict:
+        try:
+            return jwt.decode(token, options = {'verify_signature': False})
+        except jwt.PyJWTError:
+            return {}
+
+
+    #Date d'expiration (UTC) lue dans un jeton d'accès sans vérification, None si le jeton n'en a pas
+    def access_token_expiry(token: str) -> datetime.datetime:
+        claims = AuthProvider.read_user_access_token(token)
+        if 'exp' not in claims:
+            return None
+        return datetime.datetime.fromtimestamp(claims['exp'], datetime.timezone.utc)
+
+
+    #Générer un jeton de rafraîchissement opaque
+    def create_refresh_token() -> str:
+        return secrets.token_urlsafe(32)
+
+
+    #Empreinte d'un jeton de rafraîchissement: seul le hash est stocké dans la base de données
+    #Le jeton étant aléatoire et long, un hash rapide suffit
+    def hash_refresh_token(refresh_token: str) -> str:
+        return hashlib.sha256(refresh_token.encode('utf8')).hexdigest()
+
+
     #Hasher un mot de passe
     def hash_password(password: str) -> str:
         try:
-            return bcrypt.hashpw(password.encode('utf8'), bcrypt.gensalt()).decode('utf-8')
+            return password_provider.hash_password(password)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error hashing password: {str(e)}")
 
@@ -35,6 +113,27 @@ class AuthProvider:
     #Vérifier un mot de passe
     def check_password(plain_password: str, hashed_password: str) -> bool:
         try:
-            return bcrypt.checkpw(plain_password.encode('utf8'), hashed_password.encode('utf8'))
+            return password_provider.check_password(plain_password, hashed_password)
+        except:
+            raise HTTPException(status_code = 400, detail = "Bad credentials")
+
+
+    #Vérifier si un mot de passe hashé doit être rehashé avec l'algorithme et le coût configurés
+    def password_needs_rehash(hashed_password: str) -> bool:
+        return password_provider.password_needs_rehash(hashed_password)
+
+
+    #Hasher un mot de passe dans le pool de hashage sans bloquer la boucle d'événements
+    async def hash_password_async(password: str) -> str:
+        try:
+            return await hash_pool.run(password_provider.hash_password, password)
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error hashing password: {str(e)}")
+
+
+    #Vérifier un mot de passe dans le pool de hashage sans bloquer la boucle d'événements
+    async def check_password_async(plain_password: str, hashed_password: str) -> bool:
+        try:
+            return await hash_pool.run(password_provider.check_password, plain_password, hashed_password)
         except:
             raise HTTPException(status_code = 400, detail = "Bad credentials")
\ No newline at end of file
@@ -0,0 +1,145 @@
+import collections
+import csv
+import io
+import json
+from typing import AsyncIterator
+from fastapi import HTTPException
+
+
+#Séparateur des roles dans une cellule CSV
+CSV_ROLES_SEPARATOR = ';'
+
+#Premiers caractères qu'un tableur interprète comme le début d'une formule
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+#Décoder une ligne, ou retourner l'erreur de décodage afin de la signaler sur la ligne concernée
+def _decode_line(line: bytes, keepends: bool) -> str | UnicodeDecodeError:
+    try:
+        return line.decode('utf-8') if keepends else line.decode('utf-8').rstrip('\r')
+    except UnicodeDecodeError as e:
+        return e
+
+
+#Découper un flux d'octets en lignes sans charger tout le corps de la requête en mémoire
+#Avec keepends, les fins de ligne sont conservées
+#Une ligne qui n'est pas de l'UTF-8 valide est produite sous la forme de son UnicodeDecodeError
+async def read_lines(stream: AsyncIterator[bytes], keepends: bool = False) -> AsyncIterator[str | UnicodeDecodeError]:
+    pending = b''
+    async for chunk in stream:
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield _decode_line(line + b'\n' if keepends else line, keepends)
+    if pending:
+        yield _decode_line(pending, keepends)
+
+
+class _LineFeed:
+    """
+        Itérateur alimenté au fur et à mesure par les lignes d'un flux asynchrone, lu par un csv.reader
+    """
+
+    def __init__(self):
+        self.lines = collections.deque()
+
+
+    def __iter__(self):
+        return self
+
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+#Lire les lignes NDJSON d'un flux: chaque ligne produit (numéro de ligne, document) ou (numéro de ligne, erreur)
+async def read_ndjson_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    row = 0
+    async for line in read_lines(stream):
+        if isinstance(line, UnicodeDecodeError):
+            row += 1
+            yield row, f"Invalid UTF-8: {str(line)}"
+            continue
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            document = json.loads(line)
+        except ValueError as e:
+            yield row, f"Invalid JSON: {str(e)}"
+            continue
+        yield row, document if isinstance(document, dict) else "A JSON object is expected"
+
+
+#Lire les lignes CSV d'un flux dont la première ligne contient les noms des colonnes
+#Les roles d'une ligne sont séparés par CSV_ROLES_SEPARATOR
+#Un seul csv.reader reçoit les lignes avec leurs retours à la ligne: un champ entre guillemets peut s'étendre sur plusieurs lignes
+async def read_csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header = None
+    row = 0
+    quotes = 0
+    async for line in read_lines(stream, keepends = True):
+        if isinstance(line, UnicodeDecodeError):
+            #Sans en-tête aucune ligne ne peut être importée: la requête est refusée avant toute insertion
+            if header is None:
+                raise HTTPException(status_code = 400, detail = f"Invalid UTF-8 in the CSV header: {str(line)}")
+            #La ligne est signalée avec l'enregistrement en cours de lecture qu'elle interrompt
+            feed.lines.clear()
+            quotes = 0
+            row += 1
+            yield row, f"Invalid UTF-8: {str(line)}"
+            continue
+        if not feed.lines and not line.strip():
+            continue
+        feed.lines.append(line)
+        #Un nombre impair de guillemets signifie qu'un champ entre guillemets continue sur la ligne suivante
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            feed.lines.clear()
+            if header is None:
+                raise HTTPException(status_code = 400, detail = f"Invalid CSV header: {str(e)}")
+            row += 1
+            yield row, f"Invalid CSV: {str(e)}"
+            continue
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        document = {key: value for key, value in zip(header, values) if value != ''}
+        if 'roles' in document:
+            document['roles'] = [role for role in document['roles'].split(CSV_ROLES_SEPARATOR) if role]
+        yield row, document
+    if feed.lines and header is not None:
+        yield row + 1, "Unterminated quoted field"
+
+
+#Neutraliser une valeur qu'un tableur exécuterait comme une formule en la préfixant par une apostrophe
+def _escape_formula(value: str) -> str:
+    return "'" + value if value.startswith(CSV_FORMULA_PREFIXES) else value
+
+
+#Encoder un lot de documents en lignes CSV (l'en-tête est ajouté si header est vrai)
+#Les valeurs saisies par les utilisateurs (nom, prénom...) sont protégées contre l'injection de formules
+def encode_csv_rows(documents: list[dict], fields: list[str], header: bool = False) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator = '\n')
+    if header:
+        writer.writerow(fields)
+    for document in documents:
+        writer.writerow([
+            _escape_formula(CSV_ROLES_SEPARATOR.join(value) if isinstance(value, list) else ('' if value is None else str(value)))
+            for value in (document.get(field) for field in fields)
+        ])
+    return output.getvalue()
@@ -0,0 +1,111 @@
+import asyncio
+import datetime
+import logging
+
+from config.settings import get_settings
+from providers.cache_provider import TTLCache, token_user_cache
+
+
+logger = logging.getLogger(__name__)
+
+#Marge (en secondes) relue à chaque interrogation pour couvrir les décalages d'horloge entre les workers
+CLOCK_SKEW = 5.0
+
+
+class CacheInvalidations:
+    """
+        Diffusion des invalidations d'un cache en mémoire à tous les workers et à toutes les instances
+        Chaque invalidation est appliquée au cache local puis enregistrée dans une collection que chaque worker
+        relit toutes les `interval` secondes: une entrée invalidée par un autre worker reste servie au plus
+        `interval` secondes (plus la durée d'une interrogation)
+        Les invalidations sont idempotentes: une invalidation relue plusieurs fois est sans effet
+    """
+
+    def __init__(self, cache: TTLCache, interval: float = 1.0):
+        self.cache = cache
+        self.interval = interval
+        self._collection = None
+        self._task: asyncio.Task = None
+        #Invalidations déjà appliquées: _id -> date de création
+        self._seen: dict = {}
+        self._since: datetime.datetime = None
+
+
+    #Appliquer une invalidation au cache local
+    def apply(self, keys: list = (), tags: list = (), clear: bool = False):
+        if clear:
+            self.cache.clear()
+            return
+        for key in keys:
+            self.cache.pop(key)
+        for tag in tags:
+            self.cache.invalidate_tag(tag)
+
+
+    #Invalider des entrées (clés ou tags) ou tout le cache, localement puis sur les autres workers
+    async def publish(self, keys: list = (), tags: list = (), clear: bool = False):
+        keys, tags = list(keys), [str(tag) for tag in tags]
+        if not keys and not tags and not clear:
+            return
+        self.apply(keys, tags, clear)
+        if self._collection is None:
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        insert_result = await self._collection.insert_one({'keys': keys, 'tags': tags, 'clear': clear, 'created_at': now})
+        self._seen[insert_result.inserted_id] = now
+
+
+    #Appliquer les invalidations publiées par les autres workers depuis la dernière interrogation
+    async def poll_once(self) -> int:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        since = (self._since or now) - datetime.timedelta(seconds = CLOCK_SKEW)
+        invalidations = await self._collection.find({'created_at': {'$gte': since}}).to_list(length = None)
+        applied = 0
+        for invalidation in invalidations:
+            if invalidation['_id'] in self._seen:
+                continue
+            self._seen[invalidation['_id']] = invalidation['created_at']
+            self.apply(invalidation.get('keys', []), invalidation.get('tags', []), invalidation.get('clear', False))
+            applied += 1
+        self._since = now
+        #Oublier les invalidations sorties de la fenêtre relue
+        self._seen = {
+            id: created_at for id, created_at in self._seen.items()
+            if created_at.replace(tzinfo = datetime.timezone.utc) >= since
+        }
+        return applied
+
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.warning("Error while reading cache invalidations: %s", e)
+
+
+    #Publier les invalidations dans la collection et suivre celles des autres workers en tâche de fond
+    #Avec un intervalle nul, les invalidations restent locales (un seul worker)
+    def start(self, collection):
+        if self.interval <= 0:
+            return
+        self._collection = collection
+        self._since = datetime.datetime.now(datetime.timezone.utc)
+        self._task = asyncio.create_task(self.run())
+
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._collection = None
+        self._seen = {}
+
+
+#Invalidations du cache des utilisateurs résolus à partir de leur jeton
+user_cache_invalidations = CacheInvalidations(token_user_cache, interval = get_settings().user_cache_invalidation_interval)
@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from config.settings import get_settings
+
+
+class TTLCache:
+    """
+        Cache LRU borné en mémoire avec expiration des entrées (TTL)
+        Chaque entrée peut être associée à un tag (ex: l'id d'un utilisateur) afin de pouvoir
+        invalider d'un coup toutes les entrées liées à ce tag
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        #Entrées du cache: clé -> (date d'expiration, tag, valeur)
+        self._entries: OrderedDict[Hashable, tuple[float, Optional[Hashable], Any]] = OrderedDict()
+        #Index secondaire: tag -> ensemble des clés associées
+        self._tags: dict[Hashable, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    #Récupérer une valeur du cache, None si elle est absente ou expirée
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+
+    #Ajouter une valeur dans le cache en évinçant l'entrée la moins récemment utilisée si nécessaire
+    def set(self, key: Hashable, value: Any, tag: Optional[Hashable] = None, ttl: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), tag, value)
+        if tag is not None:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+
+    #Supprimer une entrée du cache
+    def pop(self, key: Hashable) -> Any:
+        if key not in self._entries:
+            return None
+        return self._remove(key)
+
+
+    #Supprimer toutes les entrées associées à un tag
+    def invalidate_tag(self, tag: Hashable) -> int:
+        keys = self._tags.pop(tag, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+
+    #Vider complètement le cache
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+
+    #Statistiques d'utilisation du cache
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+
+    def _remove(self, key: Hashable) -> Any:
+        _, tag, value = self._entries.pop(key)
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return value
+
+
+#Cache des utilisateurs résolus à partir de leur jeton d'accès (clé: jeton, tag: id de l'utilisateur)
+token_user_cache = TTLCache(
+    maxsize = get_settings().user_cache_size,
+    ttl = get_settings().user_cache_ttl,
+)
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from config.settings import get_settings
+from providers.metrics_provider import add_timing
+
+
+#Exécuter une fonction et retourner son résultat avec sa durée d'exécution (exécuté dans le worker)
+def _timed_call(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class HashPoolMetrics:
+    """
+        Métriques du pool de hashage: nombre d'opérations, temps d'attente avant exécution
+        (admission + file du pool) et temps de hashage
+    """
+
+    def __init__(self):
+        self.operations = 0
+        self.in_flight = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.total_hash_time = 0.0
+        self.max_hash_time = 0.0
+
+
+    def record(self, wait_time: float, hash_time: float):
+        self.operations += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        self.total_hash_time += hash_time
+        self.max_hash_time = max(self.max_hash_time, hash_time)
+
+
+    def snapshot(self) -> dict:
+        return {
+            'operations': self.operations,
+            'in_flight': self.in_flight,
+            'avg_wait_time': self.total_wait_time / self.operations if self.operations else 0.0,
+            'max_wait_time': self.max_wait_time,
+            'avg_hash_time': self.total_hash_time / self.operations if self.operations else 0.0,
+            'max_hash_time': self.max_hash_time,
+        }
+
+
+class HashPool:
+    """
+        Pool de workers (threads ou processus) dédié aux opérations de hashage coûteuses en CPU
+        Un sémaphore limite le nombre d'opérations admises simultanément afin de ne pas saturer le pool
+    """
+
+    def __init__(self, kind: str = 'thread', size: int = 1, concurrency: int = 1):
+        self.kind = kind
+        self.size = size
+        self.concurrency = concurrency
+        self.metrics = HashPoolMetrics()
+        self._executor: Executor = None
+        self._executor_lock = threading.Lock()
+        #Un sémaphore par boucle d'événements car les primitives asyncio y sont liées
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+
+
+    #Récupérer l'executor en le créant au premier usage
+    @property
+    def executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers = self.size)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers = self.size, thread_name_prefix = 'hash-pool')
+            return self._executor
+
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+
+    #Exécuter une fonction dans le pool et attendre son résultat sans bloquer la boucle d'événements
+    async def run(self, fn, *args):
+        queued_at = time.perf_counter()
+        self.metrics.in_flight += 1
+        try:
+            async with self._semaphore():
+                loop = asyncio.get_running_loop()
+                result, hash_time = await loop.run_in_executor(self.executor, _timed_call, fn, *args)
+            #Le temps d'attente inclut l'admission et la file d'attente de l'executor
+            self.metrics.record(time.perf_counter() - queued_at - hash_time, hash_time)
+            #La requête en cours attend le hashage et son admission dans le pool
+            add_timing('hash', time.perf_counter() - queued_at)
+            return result
+        finally:
+            self.metrics.in_flight -= 1
+
+
+    #Arrêter les workers du pool
+    def shutdown(self, wait: bool = True):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait = wait)
+                self._executor = None
+        self._semaphores.clear()
+
+
+#Pool de hashage des mots de passe
+HASH_POOL_SIZE = get_settings().hash_pool_size
+hash_pool = HashPool(
+    kind = get_settings().hash_pool_kind,
+    size = HASH_POOL_SIZE,
+    concurrency = get_settings().hash_pool_concurrency or HASH_POOL_SIZE * 4,
+)
@@ -0,0 +1,157 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config.settings import get_settings
+
+
+#Phases mesurées pendant une requête
+PHASES = ('auth', 'mongo', 'hash', 'serialization')
+
+#Bornes (en secondes) des histogrammes de durée et (en nombre) de l'histogramme des opérations MongoDB
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+#Activer l'instrumentation des requêtes (histogrammes /metrics et entête Server-Timing)
+INSTRUMENTATION_ENABLED = get_settings().instrumentation_enabled
+
+
+class RequestTimings:
+    """
+        Temps passé dans chaque phase d'une requête et nombre d'opérations MongoDB
+        Les opérations MongoDB sont enregistrées depuis les threads du driver: les mises à jour sont protégées par un verrou
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations = {phase: 0.0 for phase in PHASES}
+        self.mongo_operations = 0
+        self._lock = threading.Lock()
+
+
+    def add(self, phase: str, duration: float):
+        with self._lock:
+            self.durations[phase] += duration
+
+
+    def add_mongo_operation(self, duration: float):
+        with self._lock:
+            self.durations['mongo'] += duration
+            self.mongo_operations += 1
+
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+
+    #Valeur de l'entête Server-Timing (durées en millisecondes)
+    def server_timing(self) -> str:
+        metrics = [f"total;dur={self.elapsed() * 1000:.3f}"]
+        for phase, duration in self.durations.items():
+            if phase == 'mongo':
+                metrics.append(f'mongo;dur={duration * 1000:.3f};desc="{self.mongo_operations} ops"')
+            elif duration:
+                metrics.append(f"{phase};dur={duration * 1000:.3f}")
+        return ', '.join(metrics)
+
+
+#Mesures de la requête en cours (None en dehors d'une requête instrumentée)
+current_timings: ContextVar[RequestTimings] = ContextVar('current_timings', default = None)
+
+
+#Ajouter une durée à une phase de la requête en cours
+def add_timing(phase: str, duration: float):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(phase, duration)
+
+
+#Mesurer la durée d'un bloc et l'ajouter à une phase de la requête en cours
+@contextmanager
+def timed(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(phase, time.perf_counter() - start)
+
+
+class Histogram:
+    """
+        Histogramme au format Prometheus: compteurs cumulés par borne, somme et nombre d'observations
+        Une série est conservée par combinaison de labels
+    """
+
+    def __init__(self, name: str, description: str, buckets: tuple, labels: tuple):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labels = labels
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                #Compteurs par borne (+Inf inclus), somme, nombre
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {label_values: (list(counts), total, count) for label_values, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = ','.join(f'{label}="{value}"' for label, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class RequestMetrics:
+    """
+        Histogrammes des requêtes par méthode et modèle de route
+    """
+
+    def __init__(self):
+        labels = ('method', 'route')
+        self.duration = Histogram('http_request_duration_seconds', "Total request latency", DURATION_BUCKETS, (*labels, 'status'))
+        self.phases = {
+            phase: Histogram(f'http_request_{phase}_seconds', f"Time spent in {phase} per request", DURATION_BUCKETS, labels)
+            for phase in PHASES
+        }
+        self.mongo_operations = Histogram('http_request_mongo_operations', "MongoDB operations per request", COUNT_BUCKETS, labels)
+
+
+    def observe(self, method: str, route: str, status: int, timings: RequestTimings):
+        self.duration.observe(timings.elapsed(), method, route, str(status))
+        for phase, histogram in self.phases.items():
+            histogram.observe(timings.durations[phase], method, route)
+        self.mongo_operations.observe(timings.mongo_operations, method, route)
+
+
+    #Exposition au format texte Prometheus, complétée par des jauges (ex: statistiques des pools)
+    def render(self, gauges: dict[str, float] = None) -> str:
+        lines = self.duration.render()
+        for histogram in self.phases.values():
+            lines.extend(histogram.render())
+        lines.extend(self.mongo_operations.render())
+        for name, value in (gauges or {}).items():
+            lines.extend([f"# TYPE {name} gauge", f"{name} {value}"])
+        return '\n'.join(lines) + '\n'
+
+
+#Métriques des requêtes de l'application
+request_metrics = RequestMetrics()
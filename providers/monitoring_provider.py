@@ -0,0 +1,143 @@
+import threading
+import time
+
+from pymongo import monitoring
+
+from providers.metrics_provider import current_timings
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+        Listener CMAP (Connection Monitoring and Pooling) du driver MongoDB
+        Comptabilise les connexions du pool et le temps d'attente pour obtenir une connexion
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        #Les checkouts sont synchrones dans le thread du driver: le début est mémorisé par thread
+        self._checkout_started = threading.local()
+        self.pools = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.pool_clears = 0
+        self.total_checkout_time = 0.0
+        self.max_checkout_time = 0.0
+
+
+    def pool_created(self, event):
+        with self._lock:
+            self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.pools -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        self._checkout_started.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout_started, 'value', None)
+        checkout_time = time.perf_counter() - started if started is not None else 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.total_checkout_time += checkout_time
+            self.max_checkout_time = max(self.max_checkout_time, checkout_time)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+
+    #Statistiques courantes du pool de connexions
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'pools': self.pools,
+                'connections_open': self.connections_created - self.connections_closed,
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'connections_checked_out': self.checked_out,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'pool_clears': self.pool_clears,
+                'avg_checkout_time': self.total_checkout_time / self.checkouts if self.checkouts else 0.0,
+                'max_checkout_time': self.max_checkout_time,
+            }
+
+
+#Listener du pool de connexions du client MongoDB de l'application
+pool_stats_listener = PoolStatsListener()
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """
+        Listener des commandes du driver MongoDB
+        Chaque commande terminée est comptée globalement et attribuée à la requête en cours:
+        motor exécute le driver dans un thread avec une copie du contexte de la requête
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = 0
+        self.failures = 0
+        self.total_time = 0.0
+
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        with self._lock:
+            self.failures += 1
+        self._record(event.duration_micros / 1_000_000)
+
+
+    def _record(self, duration: float):
+        with self._lock:
+            self.commands += 1
+            self.total_time += duration
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add_mongo_operation(duration)
+
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'commands': self.commands,
+                'command_failures': self.failures,
+                'avg_command_time': self.total_time / self.commands if self.commands else 0.0,
+            }
+
+
+#Listener des commandes du client MongoDB de l'application
+command_stats_listener = CommandStatsListener()
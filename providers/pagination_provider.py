@@ -0,0 +1,19 @@
+import base64
+import binascii
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+
+#Encoder l'_id du dernier document d'une page en curseur opaque
+def encode_cursor(last_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(ObjectId(last_id).binary).decode('ascii').rstrip('=')
+
+
+#Décoder un curseur opaque en _id à partir duquel reprendre la pagination
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise HTTPException(status_code = 400, detail = "Invalid pagination cursor")
@@ -0,0 +1,182 @@
+import base64
+import hashlib
+import hmac
+import os
+
+import bcrypt
+
+from config.settings import get_settings
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+
+class BcryptHasher:
+    """
+        Hashage bcrypt avec un coût (nombre de rounds) configurable
+        Format: $2b$<rounds>$<salt+hash>
+    """
+    algorithm = 'bcrypt'
+
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
+
+
+    @staticmethod
+    def identify(hashed_password: str) -> bool:
+        return hashed_password.startswith('$2')
+
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf8'), bcrypt.gensalt(rounds = self.rounds)).decode('utf-8')
+
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return bcrypt.checkpw(password.encode('utf8'), hashed_password.encode('utf8'))
+
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return int(hashed_password.split('$')[2]) != self.rounds
+
+
+class ScryptHasher:
+    """
+        Hashage scrypt (hashlib) avec des paramètres de coût CPU/mémoire configurables
+        Format: $scrypt$ln=<log2 N>,r=<r>,p=<p>$<salt>$<hash>
+    """
+    algorithm = 'scrypt'
+
+    def __init__(self, log_n: int = 14, r: int = 8, p: int = 1):
+        self.log_n = log_n
+        self.r = r
+        self.p = p
+
+
+    @staticmethod
+    def identify(hashed_password: str) -> bool:
+        return hashed_password.startswith('$scrypt$')
+
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+        n = 2 ** log_n
+        return hashlib.scrypt(password.encode('utf8'), salt = salt, n = n, r = r, p = p, maxmem = 256 * n * r, dklen = 32)
+
+
+    @staticmethod
+    def _parse(hashed_password: str) -> tuple[int, int, int, bytes, bytes]:
+        _, _, params, salt, digest = hashed_password.split('$')
+        params = dict(param.split('=') for param in params.split(','))
+        return (
+            int(params['ln']), int(params['r']), int(params['p']),
+            base64.b64decode(salt), base64.b64decode(digest)
+        )
+
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.log_n, self.r, self.p)
+        return "$scrypt$ln={},r={},p={}${}${}".format(
+            self.log_n, self.r, self.p,
+            base64.b64encode(salt).decode('ascii'), base64.b64encode(digest).decode('ascii')
+        )
+
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        log_n, r, p, salt, digest = self._parse(hashed_password)
+        return hmac.compare_digest(self._derive(password, salt, log_n, r, p), digest)
+
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return self._parse(hashed_password)[:3] != (self.log_n, self.r, self.p)
+
+
+class Argon2Hasher:
+    """
+        Hashage argon2id (dépendance optionnelle argon2-cffi) avec des paramètres de coût configurables
+        Format: $argon2id$v=19$m=<memory>,t=<time>,p=<parallelism>$<salt>$<hash>
+    """
+    algorithm = 'argon2'
+
+    def __init__(self, time_cost: int = 3, memory_cost: int = 65536, parallelism: int = 4):
+        if argon2 is None:
+            raise RuntimeError("The argon2 password hash algorithm requires the argon2-cffi package")
+        self._hasher = argon2.PasswordHasher(time_cost = time_cost, memory_cost = memory_cost, parallelism = parallelism)
+
+
+    @staticmethod
+    def identify(hashed_password: str) -> bool:
+        return hashed_password.startswith('$argon2')
+
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            return self._hasher.verify(hashed_password, password)
+        except argon2.exceptions.VerifyMismatchError:
+            return False
+
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return self._hasher.check_needs_rehash(hashed_password)
+
+
+HASHERS = (BcryptHasher, ScryptHasher, Argon2Hasher)
+
+
+#Construire le hasher configuré dans les paramètres de l'application
+def configured_password_hasher():
+    settings = get_settings()
+    if settings.password_hash_algorithm == 'scrypt':
+        return ScryptHasher(
+            log_n = settings.scrypt_log_n,
+            r = settings.scrypt_r,
+            p = settings.scrypt_p,
+        )
+    if settings.password_hash_algorithm == 'argon2':
+        return Argon2Hasher(
+            time_cost = settings.argon2_time_cost,
+            memory_cost = settings.argon2_memory_cost,
+            parallelism = settings.argon2_parallelism,
+        )
+    return BcryptHasher(rounds = settings.bcrypt_rounds)
+
+
+#Hasher utilisé pour les nouveaux mots de passe
+password_hasher = configured_password_hasher()
+
+
+#Trouver la classe de hasher correspondant au format d'un mot de passe hashé
+def identify_hasher(hashed_password: str):
+    for hasher in HASHERS:
+        if hasher.identify(hashed_password):
+            return hasher
+    raise ValueError("Unknown password hash format")
+
+
+#Hasher un mot de passe avec l'algorithme configuré
+def hash_password(password: str) -> str:
+    return password_hasher.hash(password)
+
+
+#Vérifier un mot de passe quel que soit l'algorithme avec lequel il a été hashé
+def check_password(password: str, hashed_password: str) -> bool:
+    hasher = identify_hasher(hashed_password)
+    if isinstance(password_hasher, hasher):
+        return password_hasher.verify(password, hashed_password)
+    #Les paramètres sont lus dans le hash, une instance par défaut suffit pour vérifier
+    return hasher().verify(password, hashed_password)
+
+
+#Vérifier si un mot de passe hashé utilise un algorithme ou des paramètres différents de ceux configurés
+def password_needs_rehash(hashed_password: str) -> bool:
+    try:
+        hasher = identify_hasher(hashed_password)
+    except ValueError:
+        return True
+    return not isinstance(password_hasher, hasher) or password_hasher.needs_rehash(hashed_password)
@@ -0,0 +1,51 @@
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel
+
+from config.settings import get_settings
+from providers.metrics_provider import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+#Classe de réponse par défaut de l'application: "orjson" (si le paquet est installé) ou "json"
+RESPONSE_CLASS = get_settings().response_class
+
+#Ne pas revalider via response_model les modèles déjà validés retournés par les services
+SKIP_RESPONSE_VALIDATION = get_settings().skip_response_validation
+
+
+#Réponses JSON dont l'encodage est mesuré dans la phase 'serialization' de la requête
+class TimedJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        with timed('serialization'):
+            return super().render(content)
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        with timed('serialization'):
+            return super().render(content)
+
+
+#Récupérer la classe de réponse JSON configurée
+def default_response_class() -> type[Response]:
+    if RESPONSE_CLASS == 'orjson' and orjson is not None:
+        return TimedORJSONResponse
+    return TimedJSONResponse
+
+
+#Retourner un modèle déjà validé, sérialisé directement par pydantic-core si SKIP_RESPONSE_VALIDATION est activé
+#Sinon le modèle est retourné tel quel et FastAPI le valide et le sérialise via response_model
+def fast_response(model: BaseModel, status_code: int = 200, **dump_options):
+    if not SKIP_RESPONSE_VALIDATION:
+        return model
+    with timed('serialization'):
+        content = model.model_dump_json(by_alias = True, **dump_options)
+    return Response(
+        content = content,
+        status_code = status_code,
+        media_type = 'application/json',
+    )
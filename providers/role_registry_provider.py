@@ -0,0 +1,147 @@
+import asyncio
+import logging
+
+from pymongo.errors import OperationFailure
+
+from config.settings import get_settings
+from models.role import RoleModel
+
+
+logger = logging.getLogger(__name__)
+
+#Champs lus pour construire un RoleModel
+ROLE_PROJECTION = RoleModel.document_projection()
+
+#Pipeline du change stream: le document complet est restreint aux champs d'un RoleModel
+#Dans un $project, seul l'_id de premier niveau est gardé par défaut: celui du document doit être demandé
+ROLE_CHANGE_PIPELINE = [{'$project': {
+    'operationType': 1,
+    'documentKey': 1,
+    **{f'fullDocument.{field}': 1 for field in (*ROLE_PROJECTION, '_id')},
+}}]
+
+
+class RoleRegistry:
+    """
+        Registre en mémoire des roles, chargé au démarrage de l'application
+        Il est tenu à jour par les écritures du RoleService et par un change stream MongoDB,
+        ou par un rechargement périodique lorsque les change streams ne sont pas disponibles
+    """
+
+    def __init__(self, poll_interval: float = 30.0):
+        self.poll_interval = poll_interval
+        self.loaded = False
+        self._roles: dict[str, RoleModel] = {}
+        self._names_by_id: dict[str, str] = {}
+        self._task: asyncio.Task = None
+
+
+    #Charger tous les roles depuis la collection
+    async def load(self, collection):
+        roles = await collection.find(projection = ROLE_PROJECTION).sort('_id', 1).to_list(length = None)
+        self._roles = {}
+        self._names_by_id = {}
+        for role in roles:
+            self.upsert(RoleModel.from_document(role))
+        self.loaded = True
+
+
+    #Ajouter ou remplacer un role dans le registre
+    def upsert(self, role: RoleModel):
+        previous_name = self._names_by_id.get(role.id)
+        if previous_name is not None and previous_name != role.name:
+            self._roles.pop(previous_name, None)
+        self._roles[role.name] = role
+        if role.id is not None:
+            self._names_by_id[role.id] = role.name
+
+
+    #Retirer un role du registre à partir de son nom ou de son id
+    def remove(self, name: str = None, id: str = None):
+        if name is None:
+            name = self._names_by_id.get(id)
+        role = self._roles.pop(name, None)
+        if role is not None and role.id is not None:
+            self._names_by_id.pop(role.id, None)
+
+
+    def clear(self):
+        self._roles = {}
+        self._names_by_id = {}
+
+
+    def get(self, name: str) -> RoleModel:
+        return self._roles.get(name)
+
+
+    def get_by_id(self, id: str) -> RoleModel:
+        name = self._names_by_id.get(id)
+        return self._roles.get(name) if name is not None else None
+
+
+    def list(self, offset: int = 0, limit: int = None) -> list[RoleModel]:
+        roles = list(self._roles.values())
+        return roles[offset:] if limit is None else roles[offset:offset + limit]
+
+
+    #Appliquer un événement du change stream de la collection des roles
+    def apply_change(self, change: dict):
+        operation = change['operationType']
+        if operation in ('insert', 'update', 'replace') and change.get('fullDocument') is not None:
+            self.upsert(RoleModel.from_document(change['fullDocument']))
+        elif operation == 'delete':
+            self.remove(id = str(change['documentKey']['_id']))
+
+
+    #Suivre les modifications de la collection par change stream, sinon par rechargement périodique
+    async def watch(self, collection):
+        while True:
+            try:
+                async with collection.watch(ROLE_CHANGE_PIPELINE, full_document = 'updateLookup') as stream:
+                    #Recharger pour ne pas manquer les modifications faites avant l'ouverture du stream
+                    await self.load(collection)
+                    async for change in stream:
+                        if change['operationType'] in ('drop', 'rename', 'invalidate'):
+                            await self.load(collection)
+                            break
+                        self.apply_change(change)
+            except asyncio.CancelledError:
+                raise
+            except (OperationFailure, NotImplementedError) as e:
+                #Les change streams nécessitent un replica set
+                logger.info("Role change stream unavailable (%s), polling every %ss", e, self.poll_interval)
+                await self.poll(collection)
+            except Exception as e:
+                logger.warning("Role change stream interrupted: %s", e)
+                await asyncio.sleep(self.poll_interval)
+
+
+    #Recharger périodiquement tous les roles
+    async def poll(self, collection):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.load(collection)
+            except Exception as e:
+                logger.warning("Error while reloading roles: %s", e)
+
+
+    #Charger le registre puis démarrer le suivi des modifications en tâche de fond
+    async def start(self, collection):
+        await self.load(collection)
+        self._task = asyncio.create_task(self.watch(collection))
+
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.loaded = False
+
+
+#Registre des roles de l'application
+role_registry = RoleRegistry(poll_interval = get_settings().role_registry_poll_interval)
@@ -0,0 +1,146 @@
+import asyncio
+import datetime
+import logging
+import time
+import uuid
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config.settings import get_settings
+from providers.auth_provider import ACCESS_TOKEN_LIFETIME
+
+
+logger = logging.getLogger(__name__)
+
+
+#Collections de jetons suivies par la maintenance
+TOKEN_COLLECTIONS = ('user_access_tokens', 'user_revoked_tokens')
+
+#Bail partagé par les workers: un seul worker à la fois exécute la maintenance
+LEASE_COLLECTION = 'maintenance_leases'
+LEASE_ID = 'token_maintenance'
+
+
+class TokenMaintenance:
+    """
+        Tâche de fond de maintenance des collections de jetons
+        Les jetons expirés sont supprimés par les index TTL: la tâche mesure la taille des collections
+        et le rythme des purges, et supprime les anciens jetons émis sans date d'expiration
+        Chaque worker démarre la tâche mais seul le détenteur du bail (document LEASE_ID) exécute les passes:
+        si ce worker s'arrête, un autre reprend la maintenance à l'expiration du bail (deux intervalles)
+    """
+
+    def __init__(self, interval: float = 300.0):
+        self.interval = interval
+        self.last_report: dict = {}
+        self._last_ttl_deleted: int = None
+        self._last_run: float = None
+        self._task: asyncio.Task = None
+        #Identifiant du détenteur du bail, propre à chaque worker
+        self.owner = uuid.uuid4().hex
+
+
+    #Statistiques de stockage d'une collection (collStats)
+    @staticmethod
+    async def collection_stats(db, collection_name: str) -> dict:
+        stats = await db.command('collStats', collection_name)
+        return {
+            'count': stats.get('count', 0),
+            'size': stats.get('size', 0),
+            'storage_size': stats.get('storageSize', 0),
+            'total_index_size': stats.get('totalIndexSize', 0),
+        }
+
+
+    #Nombre total de documents supprimés par les index TTL depuis le démarrage du serveur MongoDB
+    @staticmethod
+    async def ttl_deleted_documents(db) -> int:
+        status = await db.client.admin.command('serverStatus')
+        return status['metrics']['ttl']['deletedDocuments']
+
+
+    #Supprimer les jetons émis sans date d'expiration et plus anciens que la durée de validité d'un jeton
+    #La date d'émission est lue dans l'_id du document
+    @staticmethod
+    async def purge_legacy_tokens(db) -> int:
+        issued_before = ObjectId.from_datetime(datetime.datetime.now(datetime.timezone.utc) - ACCESS_TOKEN_LIFETIME)
+        del_result = await db.get_collection('user_access_tokens').delete_many({
+            'expires_at': {'$exists': False},
+            '_id': {'$lt': issued_before},
+        })
+        return del_result.deleted_count
+
+
+    #Acquérir ou prolonger le bail de maintenance, retourne False s'il est détenu par un autre worker
+    async def acquire_lease(self, db) -> bool:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        try:
+            lease = await db.get_collection(LEASE_COLLECTION).find_one_and_update(
+                {'_id': LEASE_ID, '$or': [{'owner': self.owner}, {'expires_at': {'$lte': now}}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + datetime.timedelta(seconds = 2 * self.interval)}},
+                upsert = True,
+                return_document = ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            #Bail détenu et non expiré: l'upsert entre en conflit avec le document existant
+            return False
+        return lease is not None
+
+
+    #Exécuter une passe de maintenance et retourner son rapport
+    async def run_once(self, db) -> dict:
+        now = time.monotonic()
+        report = {'legacy_tokens_purged': await self.purge_legacy_tokens(db)}
+        for collection_name in TOKEN_COLLECTIONS:
+            try:
+                report[collection_name] = await self.collection_stats(db, collection_name)
+            except Exception as e:
+                logger.warning("Error while reading stats of %s: %s", collection_name, e)
+        try:
+            ttl_deleted = await self.ttl_deleted_documents(db)
+            if self._last_ttl_deleted is not None:
+                report['ttl_purged_per_minute'] = (ttl_deleted - self._last_ttl_deleted) * 60 / (now - self._last_run)
+            self._last_ttl_deleted = ttl_deleted
+        except Exception as e:
+            logger.warning("Error while reading TTL purge metrics: %s", e)
+        self._last_run = now
+        self.last_report = report
+        logger.info("Token maintenance: %s", report)
+        return report
+
+
+    async def run(self, db):
+        while True:
+            try:
+                if await self.acquire_lease(db):
+                    await self.run_once(db)
+                else:
+                    #Le rythme des purges n'est calculé qu'entre deux passes consécutives de ce worker
+                    self._last_ttl_deleted = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Token maintenance failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+
+    #Démarrer la maintenance en tâche de fond (désactivée si l'intervalle est nul)
+    def start(self, db):
+        if self.interval > 0:
+            self._task = asyncio.create_task(self.run(db))
+
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+#Maintenance des jetons de l'application
+token_maintenance = TokenMaintenance(interval = get_settings().token_maintenance_interval)
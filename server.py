@@ -0,0 +1,126 @@
+"""
+    Lanceur de production de l'application main:app
+
+    python server.py
+
+    Avec gunicorn (si installé), les workers UvicornWorker sont supervisés: un worker arrêté est remplacé,
+    ce qui permet de les recycler après SERVER_MAX_REQUESTS requêtes. Sinon uvicorn lance lui-même les workers,
+    sans recyclage
+    L'event loop uvloop et le parser HTTP httptools sont utilisés lorsqu'ils sont installés (valeur "auto")
+"""
+import logging
+import os
+
+from config.enviro import env
+
+try:
+    import gunicorn.app.base
+    from uvicorn.workers import UvicornWorker
+except ImportError:
+    gunicorn = None
+    UvicornWorker = None
+
+
+logger = logging.getLogger(__name__)
+
+APP = 'main:app'
+
+#Paramètres du serveur définis dans le .env
+SERVER_HOST = env('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(env('SERVER_PORT', 8000))
+#Un worker par CPU: chaque worker a sa propre boucle d'événements et son propre client MongoDB
+SERVER_WORKERS = int(env('SERVER_WORKERS', os.cpu_count() or 1))
+#Implémentations de l'event loop ("auto", "uvloop" ou "asyncio") et du protocole HTTP ("auto", "httptools" ou "h11")
+SERVER_LOOP = env('SERVER_LOOP', 'auto')
+SERVER_HTTP = env('SERVER_HTTP', 'auto')
+#Recycler un worker après ce nombre de requêtes (0: jamais), avec une variation aléatoire pour ne pas tous les recycler ensemble
+SERVER_MAX_REQUESTS = int(env('SERVER_MAX_REQUESTS', 10000))
+SERVER_MAX_REQUESTS_JITTER = int(env('SERVER_MAX_REQUESTS_JITTER', 1000))
+#Délai (en secondes) laissé aux requêtes en cours pour se terminer à l'arrêt d'un worker
+SERVER_GRACEFUL_TIMEOUT = int(env('SERVER_GRACEFUL_TIMEOUT', 30))
+SERVER_KEEPALIVE = int(env('SERVER_KEEPALIVE', 5))
+SERVER_BACKLOG = int(env('SERVER_BACKLOG', 2048))
+SERVER_LOG_LEVEL = env('SERVER_LOG_LEVEL', 'info')
+#Serveur à utiliser: "auto" (gunicorn si installé), "gunicorn" ou "uvicorn"
+SERVER_MANAGER = env('SERVER_MANAGER', 'auto')
+
+
+if UvicornWorker is not None:
+    class AppUvicornWorker(UvicornWorker):
+        """
+            Worker uvicorn de gunicorn utilisant l'event loop et le protocole HTTP configurés
+        """
+        CONFIG_KWARGS = {'loop': SERVER_LOOP, 'http': SERVER_HTTP, 'lifespan': 'on'}
+
+
+    class GunicornApplication(gunicorn.app.base.BaseApplication):
+        """
+            Application gunicorn configurée par code plutôt que par un fichier de configuration
+        """
+
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+
+        def load(self):
+            from main import app
+            return app
+
+
+#Options de gunicorn
+def gunicorn_options() -> dict:
+    return {
+        'bind': f"{SERVER_HOST}:{SERVER_PORT}",
+        'workers': SERVER_WORKERS,
+        'worker_class': 'server.AppUvicornWorker',
+        'max_requests': SERVER_MAX_REQUESTS,
+        'max_requests_jitter': SERVER_MAX_REQUESTS_JITTER,
+        'graceful_timeout': SERVER_GRACEFUL_TIMEOUT,
+        #Un worker bloqué plus longtemps que ce délai est remplacé
+        'timeout': SERVER_GRACEFUL_TIMEOUT * 2,
+        'keepalive': SERVER_KEEPALIVE,
+        'backlog': SERVER_BACKLOG,
+        'loglevel': SERVER_LOG_LEVEL,
+    }
+
+
+#Options de uvicorn.run
+def uvicorn_options() -> dict:
+    options = {
+        'host': SERVER_HOST,
+        'port': SERVER_PORT,
+        'workers': SERVER_WORKERS,
+        'loop': SERVER_LOOP,
+        'http': SERVER_HTTP,
+        'lifespan': 'on',
+        'backlog': SERVER_BACKLOG,
+        'timeout_keep_alive': SERVER_KEEPALIVE,
+        'timeout_graceful_shutdown': SERVER_GRACEFUL_TIMEOUT,
+        'log_level': SERVER_LOG_LEVEL,
+    }
+    #limit_max_requests n'est jamais utilisé: uvicorn s'arrête après ce nombre de requêtes et rien ne le relance
+    #(le superviseur de uvicorn ne relance pas un worker arrêté), le recyclage nécessite gunicorn
+    if SERVER_MAX_REQUESTS > 0:
+        logger.warning("SERVER_MAX_REQUESTS is ignored with uvicorn, install gunicorn to recycle workers")
+    return options
+
+
+def run():
+    use_gunicorn = SERVER_MANAGER == 'gunicorn' or (SERVER_MANAGER == 'auto' and gunicorn is not None)
+    if use_gunicorn:
+        if gunicorn is None:
+            raise RuntimeError("SERVER_MANAGER is gunicorn but gunicorn is not installed")
+        GunicornApplication(gunicorn_options()).run()
+    else:
+        import uvicorn
+        uvicorn.run(APP, **uvicorn_options())
+
+
+if __name__ == '__main__':
+    run()
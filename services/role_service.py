@@ -4,7 +4,7 @@ from fastapi import HTTPException
 
 from models.role import RoleCollection, RoleModel
 from dependencies.db_collections import DatabaseCollection
-from config.database import db
+from providers.role_registry_provider import ROLE_PROJECTION, role_registry
 
 class RoleService:
     _instance = None
@@ -15,14 +15,22 @@ class RoleService:
         return cls._instance
     
 
-    _role_collection = DatabaseCollection(db = db).role_collection
+    #Collection résolue à chaque accès à partir du client MongoDB courant
+    @property
+    def _role_collection(self):
+        return DatabaseCollection().role_collection
 
 
-    #Récupérer toute la collection des roles
-    async def list_roles(self) -> RoleCollection:
+    #Récupérer une page de la collection des roles, servie par le registre en mémoire s'il est chargé
+    async def list_roles(self, offset: int = 0, limit: int = None) -> RoleCollection:
         try:
-            return RoleCollection(
-                roles = await self._role_collection.find().to_list(length = None)
+            if role_registry.loaded:
+                return RoleCollection.model_construct(roles = role_registry.list(offset = offset, limit = limit))
+            cursor = self._role_collection.find(projection = ROLE_PROJECTION).sort('_id', 1).skip(offset)
+            if limit is not None:
+                cursor = cursor.limit(limit)
+            return RoleCollection.model_construct(
+                roles = [RoleModel.from_document(role) for role in await cursor.to_list(length = limit)]
             )
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error getting roles: {str(e)}")
@@ -31,7 +39,8 @@ class RoleService:
     #Ajouter un document de role dans la base de données
     async def create_role(self, role: RoleModel):
         try:
-            await self._role_collection.insert_one(role.model_dump(by_alias=True, exclude=['id']))
+            insert_result = await self._role_collection.insert_one(role.model_dump(by_alias=True, exclude=['id']))
+            role_registry.upsert(RoleModel(**role.model_dump(exclude=['id']), id = insert_result.inserted_id))
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error inserting role: {str(e)}")
 
@@ -39,21 +48,46 @@ class RoleService:
     #Récupérer un document de role dans la base de données
     async def get_role(self, role_name: str) -> RoleModel:
         try:
-            role_data =  await self._role_collection.find_one({'name': role_name})
+            if role_registry.loaded:
+                return role_registry.get(role_name)
+            role_data =  await self._role_collection.find_one({'name': role_name}, projection = ROLE_PROJECTION)
             if role_data is None:
                 return None
-            return RoleModel(**role_data)
+            return RoleModel.from_document(role_data)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting role: {str(e)}")
 
 
+    #Vérifier l'existence d'une liste de roles en une seule requête $in
+    #Retourne les noms des roles trouvés et ceux des roles manquants
+    async def get_roles_by_names(self, role_names: list[str]) -> tuple[list[str], list[str]]:
+        role_names = list(dict.fromkeys(role_names))
+        try:
+            if role_registry.loaded:
+                existing_names = {role_name for role_name in role_names if role_registry.get(role_name) is not None}
+            else:
+                roles = await self._role_collection.find(
+                    {'name': {'$in': role_names}},
+                    projection = {'name': 1, '_id': 0}
+                ).to_list(length = None)
+                existing_names = {role['name'] for role in roles}
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error while getting roles: {str(e)}")
+        return (
+            [role_name for role_name in role_names if role_name in existing_names],
+            [role_name for role_name in role_names if role_name not in existing_names],
+        )
+
+
     #Récupérer un document de role dans la base de données à partir de son id
     async def get_role_by_id(self, id: str) -> RoleModel:
         try:
-            role_data = await self._role_collection.find_one({'_id': ObjectId(id)})
+            if role_registry.loaded:
+                return role_registry.get_by_id(str(id))
+            role_data = await self._role_collection.find_one({'_id': ObjectId(id)}, projection = ROLE_PROJECTION)
             if role_data is None:
                 return None
-            return RoleModel(**role_data)
+            return RoleModel.from_document(role_data)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting role: {str(e)}")
 
@@ -62,6 +96,7 @@ class RoleService:
     async def delete_role(self, role_name: str):
         try:
             del_result = await self._role_collection.delete_one({'name': role_name})
+            role_registry.remove(name = role_name)
             if del_result.deleted_count < 1:
                 raise HTTPException(status_code = 404, detail = f"role with role {role_name} not found")
             return del_result
@@ -73,6 +108,7 @@ class RoleService:
     async def delete_role_by_id(self, id: str):
         try:
             del_result = await self._role_collection.delete_one({'_id': ObjectId(id)})
+            role_registry.remove(id = str(id))
             if del_result.deleted_count < 1:
                 raise HTTPException(status_code = 404, detail = f"role with id {id} not found")
             return del_result
@@ -84,6 +120,7 @@ class RoleService:
     async def delete_roles(self):
         try:
             del_result = await self._role_collection.delete_many({})
+            role_registry.clear()
             if del_result.deleted_count < 1:
                 raise HTTPException(status_code = 404, detail = f"No role found to delete")
             return del_result
@@ -1,10 +1,28 @@
+import datetime
+import logging
+import uuid
 from typing import Self
 from bson import ObjectId
 from fastapi import HTTPException
 
 from models.token import AccessTokenModel
+from models.user import UserModel
+from providers.auth_provider import AUTH_MODE, REFRESH_TOKEN_LIFETIME, SHORT_ACCESS_TOKEN_LIFETIME, AuthProvider
+from providers.cache_invalidation_provider import user_cache_invalidations
 from dependencies.db_collections import DatabaseCollection
-from config.database import db
+from config.settings import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+#Stratégie de résolution jeton -> utilisateur: 'find' (deux requêtes) ou 'aggregate' (un seul $lookup)
+TOKEN_LOOKUP_STRATEGY = get_settings().token_lookup_strategy
+
+#Nombre maximal de sessions (jetons d'accès) actives par utilisateur, les plus anciennes sont évincées (0: illimité)
+MAX_SESSIONS_PER_USER = get_settings().max_sessions_per_user
+
+#Champs lus pour construire un AccessTokenModel
+ACCESS_TOKEN_PROJECTION = AccessTokenModel.document_projection()
 
 
 class TokenService:
@@ -16,46 +34,227 @@ class TokenService:
         return cls._instance
     
 
-    _token_collection = DatabaseCollection(db = db).token_collection
+    #Collection résolue à chaque accès à partir du client MongoDB courant
+    @property
+    def _token_collection(self):
+        return DatabaseCollection().token_collection
+
+    @property
+    def _revoked_token_collection(self):
+        return DatabaseCollection().revoked_token_collection
+
+    @property
+    def _refresh_token_collection(self):
+        return DatabaseCollection().refresh_token_collection
 
 
     #Ajouter un document de token dans la base de données
-    async def add_access_token(self, access_token: AccessTokenModel):
+    #Retourne le jeton persisté avec son id, sans relire la base de données
+    async def add_access_token(self, access_token: AccessTokenModel) -> AccessTokenModel:
         try:
-            await self._token_collection.insert_one({
+            insert_result = await self._token_collection.insert_one({
                 **access_token.model_dump(by_alias=True, exclude=['id', 'user_id']),
                 'user_id': ObjectId(access_token.user_id)
             })
+            return access_token.model_copy(update = {'id': str(insert_result.inserted_id)})
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error inserting token: {str(e)}")
 
 
-    #Récupérer un document de token dans la base de données
+    #Générer et stocker un nouveau jeton d'accès pour un utilisateur
+    #Le document porte la date d'expiration du jeton, utilisée par l'index TTL pour le supprimer
+    #En mode 'refresh', le jeton d'accès est de courte durée, vérifié localement et n'est pas stocké
+    async def issue_access_token(self, user: UserModel) -> AccessTokenModel:
+        if AUTH_MODE == 'refresh':
+            token = AuthProvider.create_user_access_token(
+                AuthProvider.user_token_claims(user),
+                expires_delta = SHORT_ACCESS_TOKEN_LIFETIME
+            )
+            return AccessTokenModel(token = token, user_id = user.id, expires_at = AuthProvider.access_token_expiry(token))
+        token = AuthProvider.create_user_access_token(AuthProvider.user_token_claims(user))
+        access_token = await self.add_access_token(AccessTokenModel(
+            token = token,
+            user_id = user.id,
+            expires_at = AuthProvider.access_token_expiry(token),
+            issued_at = datetime.datetime.now(datetime.timezone.utc),
+        ))
+        if MAX_SESSIONS_PER_USER > 0:
+            await self.evict_user_sessions(user.id, MAX_SESSIONS_PER_USER, keep_id = access_token.id)
+        return access_token
+
+
+    #Générer le jeton d'accès d'un utilisateur et, en mode 'refresh', un jeton de rafraîchissement d'une nouvelle famille
+    async def issue_tokens(self, user: UserModel) -> tuple[AccessTokenModel, str]:
+        access_token = await self.issue_access_token(user)
+        if AUTH_MODE != 'refresh':
+            return access_token, None
+        return access_token, await self.issue_refresh_token(user.id)
+
+
+    #Générer et stocker (hashé) un jeton de rafraîchissement
+    #Les jetons issus d'une même connexion partagent un family_id pour pouvoir être révoqués ensemble
+    async def issue_refresh_token(self, user_id: str, family_id: str = None) -> str:
+        refresh_token = AuthProvider.create_refresh_token()
+        try:
+            await self._refresh_token_collection.insert_one({
+                'token_hash': AuthProvider.hash_refresh_token(refresh_token),
+                'user_id': ObjectId(user_id),
+                'family_id': family_id or uuid.uuid4().hex,
+                'expires_at': datetime.datetime.now(datetime.timezone.utc) + REFRESH_TOKEN_LIFETIME,
+                'used_at': None,
+            })
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error inserting refresh token: {str(e)}")
+        return refresh_token
+
+
+    #Échanger un jeton de rafraîchissement contre un nouveau jeton de la même famille (rotation)
+    #Retourne l'id de l'utilisateur et le nouveau jeton de rafraîchissement
+    #La réutilisation d'un jeton déjà échangé révoque toute sa famille
+    async def rotate_refresh_token(self, refresh_token: str) -> tuple[str, str]:
+        token_hash = AuthProvider.hash_refresh_token(refresh_token)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        try:
+            #Marquer le jeton comme utilisé de manière atomique: un seul échange peut réussir
+            token_data = await self._refresh_token_collection.find_one_and_update(
+                {'token_hash': token_hash, 'used_at': None, 'revoked': {'$ne': True}, 'expires_at': {'$gt': now}},
+                {'$set': {'used_at': now}},
+                projection = {'user_id': 1, 'family_id': 1},
+            )
+            if token_data is None:
+                reused_token = await self._refresh_token_collection.find_one(
+                    {'token_hash': token_hash, 'used_at': {'$ne': None}},
+                    projection = {'family_id': 1, 'user_id': 1},
+                )
+                if reused_token is not None:
+                    logger.warning("Refresh token reuse detected for user %s, revoking its family", reused_token['user_id'])
+                    await self._refresh_token_collection.update_many(
+                        {'family_id': reused_token['family_id']},
+                        {'$set': {'revoked': True}}
+                    )
+                raise HTTPException(status_code = 401, detail = "Invalid refresh token")
+            new_refresh_token = await self.issue_refresh_token(token_data['user_id'], token_data['family_id'])
+            return str(token_data['user_id']), new_refresh_token
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error while refreshing token: {str(e)}")
+
+
+    #Supprimer les jetons de rafraîchissement d'une liste d'utilisateurs
+    async def delete_refresh_tokens_by_user_ids(self, user_ids: list[ObjectId], session = None) -> int:
+        del_result = await self._refresh_token_collection.delete_many({'user_id': {'$in': user_ids}}, session = session)
+        return del_result.deleted_count
+
+
+    #Supprimer les jetons d'un utilisateur au delà des max_sessions plus récents
+    async def evict_user_sessions(self, user_id: str, max_sessions: int, keep_id: str = None) -> int:
+        try:
+            #Parcours de l'index user_id (user_id, issued_at décroissant): les jetons émis sans issued_at sont évincés en premier
+            #Le jeton qui vient d'être émis (keep_id) est toujours conservé, même si les horloges des workers divergent
+            query = {'user_id': ObjectId(user_id)}
+            if keep_id is not None:
+                query['_id'] = {'$ne': ObjectId(keep_id)}
+                max_sessions -= 1
+            evicted_tokens = await self._token_collection.find(
+                query,
+                projection = {'token': 1}
+            ).sort([('issued_at', -1), ('_id', -1)]).skip(max_sessions).to_list(length = None)
+            if not evicted_tokens:
+                return 0
+            if AUTH_MODE == 'jwt':
+                await self.revoke_access_tokens([token['token'] for token in evicted_tokens])
+            del_result = await self._token_collection.delete_many({'_id': {'$in': [token['_id'] for token in evicted_tokens]}})
+            await user_cache_invalidations.publish(keys = [token['token'] for token in evicted_tokens])
+            return del_result.deleted_count
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error while evicting sessions: {str(e)}")
+
+
+    #Filtre d'un jeton non expiré (les jetons émis avant l'ajout de expires_at n'en ont pas)
+    @staticmethod
+    def _active_token_filter(token: str) -> dict:
+        return {'token': token, 'expires_at': {'$not': {'$lte': datetime.datetime.now(datetime.timezone.utc)}}}
+
+
+    #Récupérer un document de token non expiré dans la base de données
     async def get_access_token(self, token: str) -> AccessTokenModel:
         try:
-            token_data =  await self._token_collection.find_one({'token': token})
+            token_data =  await self._token_collection.find_one(self._active_token_filter(token), projection = ACCESS_TOKEN_PROJECTION)
             if token_data is None:
                 return None
-            return AccessTokenModel(**token_data)
+            return AccessTokenModel.from_document(token_data)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting token: {str(e)}")
 
 
+    #Récupérer en une seule agrégation le document de l'utilisateur associé à un jeton
+    #Seuls les champs d'un UserModel sont retournés (jamais le mot de passe)
+    async def get_user_data_by_token(self, token: str) -> dict:
+        try:
+            users = await self._token_collection.aggregate([
+                {'$match': self._active_token_filter(token)},
+                {'$limit': 1},
+                {'$lookup': {
+                    'from': 'users',
+                    'localField': 'user_id',
+                    'foreignField': '_id',
+                    'as': 'user',
+                }},
+                {'$unwind': '$user'},
+                {'$replaceRoot': {'newRoot': '$user'}},
+                {'$project': UserModel.document_projection()},
+            ]).to_list(length = 1)
+            return users[0] if users else None
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error while getting token user: {str(e)}")
+
+
     #Récupérer un document de token dans la base de données à partir de son id
     async def get_access_token_by_id(self, id: str) -> AccessTokenModel:
         try:
-            token_data = await self._token_collection.find_one({'_id': ObjectId(id)})
+            token_data = await self._token_collection.find_one({'_id': ObjectId(id)}, projection = ACCESS_TOKEN_PROJECTION)
             if token_data is None:
                 return None
-            return AccessTokenModel(**token_data)
+            return AccessTokenModel.from_document(token_data)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting token: {str(e)}")
 
 
+    #Révoquer des jetons d'accès JWT à partir de leur jti jusqu'à leur expiration
+    async def revoke_access_tokens(self, tokens: list[str]):
+        try:
+            revocations = []
+            for token in tokens:
+                claims = AuthProvider.read_user_access_token(token)
+                if 'jti' not in claims:
+                    continue
+                revocations.append({
+                    'jti': claims['jti'],
+                    'expires_at': datetime.datetime.fromtimestamp(claims['exp'], datetime.timezone.utc) if 'exp' in claims else None,
+                })
+            if revocations:
+                await self._revoked_token_collection.insert_many(revocations, ordered = False)
+            await user_cache_invalidations.publish(keys = tokens)
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error while revoking tokens: {str(e)}")
+
+
+    #Vérifier si un jeton d'accès JWT a été révoqué
+    async def is_access_token_revoked(self, jti: str) -> bool:
+        try:
+            return await self._revoked_token_collection.find_one({'jti': jti}, projection = {'_id': 1}) is not None
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error while checking token revocation: {str(e)}")
+
+
     #Supprimer un jeton d'accès dans la base de données
     async def delete_access_token(self, token: str):
         try:
+            if AUTH_MODE == 'jwt':
+                await self.revoke_access_tokens([token])
             del_result = await self._token_collection.delete_one({'token': token})
+            await user_cache_invalidations.publish(keys = [token])
             if del_result.deleted_count < 1:
                 raise HTTPException(status_code = 404, detail = f"Token with token {token} not found")
             return del_result
@@ -66,10 +265,13 @@ class TokenService:
     #Supprimer un jeton d'accès dans la base de données à partir de son id
     async def delete_access_token_by_id(self, id: str):
         try:
-            del_result = await self._token_collection.delete_one({'_id': ObjectId(id)})
-            if del_result.deleted_count < 1:
+            deleted_token = await self._token_collection.find_one_and_delete({'_id': ObjectId(id)}, projection = {'token': 1})
+            if deleted_token is None:
                 raise HTTPException(status_code = 404, detail = f"Token with id {id} not found")
-            return del_result
+            await user_cache_invalidations.publish(keys = [deleted_token['token']])
+            if AUTH_MODE == 'jwt':
+                await self.revoke_access_tokens([deleted_token['token']])
+            return deleted_token
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while deleting token: {str(e)}")
 
@@ -77,16 +279,49 @@ class TokenService:
     #Supprimer un jeton d'accès dans la base de données à partir de son id
     async def delete_access_token_by_user_id(self, user_id: str):
         try:
+            if AUTH_MODE == 'jwt':
+                #Révoquer les jetons de l'utilisateur car ils restent valides jusqu'à leur expiration
+                user_tokens = await self._token_collection.find(
+                    {'user_id': ObjectId(user_id)},
+                    projection = {'token': 1, '_id': 0}
+                ).to_list(length = None)
+                await self.revoke_access_tokens([token['token'] for token in user_tokens])
             del_result = await self._token_collection.delete_many({'user_id': ObjectId(user_id)})
+            if AUTH_MODE == 'refresh':
+                await self.delete_refresh_tokens_by_user_ids([ObjectId(user_id)])
+            await user_cache_invalidations.publish(tags = [user_id])
             return del_result
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while deleting token: {str(e)}")
 
 
+    #Supprimer en un seul delete_many les jetons d'accès d'une liste d'utilisateurs
+    #La session permet d'inclure la suppression dans une transaction
+    async def delete_access_tokens_by_user_ids(self, user_ids: list[ObjectId], session = None) -> int:
+        if AUTH_MODE == 'jwt':
+            user_tokens = await self._token_collection.find(
+                {'user_id': {'$in': user_ids}},
+                projection = {'token': 1, '_id': 0},
+                session = session
+            ).to_list(length = None)
+            await self.revoke_access_tokens([token['token'] for token in user_tokens])
+        del_result = await self._token_collection.delete_many({'user_id': {'$in': user_ids}}, session = session)
+        if AUTH_MODE == 'refresh':
+            await self.delete_refresh_tokens_by_user_ids(user_ids, session = session)
+        await user_cache_invalidations.publish(tags = user_ids)
+        return del_result.deleted_count
+
+
     #Supprimer tous les jetons d'accès
     async def delete_access_tokens(self):
         try:
+            if AUTH_MODE == 'jwt':
+                tokens = await self._token_collection.find({}, projection = {'token': 1, '_id': 0}).to_list(length = None)
+                await self.revoke_access_tokens([token['token'] for token in tokens])
             del_result = await self._token_collection.delete_many({})
+            if AUTH_MODE == 'refresh':
+                await self._refresh_token_collection.delete_many({})
+            await user_cache_invalidations.publish(clear = True)
             if del_result.deleted_count < 1:
                 raise HTTPException(status_code = 404, detail = f"No token found to delete")
             return del_result
@@ -1,13 +1,31 @@
-from typing import Self
+import asyncio
+import datetime
+import json
+import logging
+from typing import AsyncIterator, Self
 from bson import ObjectId
 from fastapi import Depends, HTTPException
+from pydantic import ValidationError
 from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from dependencies.db_collections import DatabaseCollection
-from models.user import CreateUserModel, UpdateUserModel, UserCollectionModel, UserModel
-from providers.auth_provider import AuthProvider
-from services.token_service import TokenService
-from config.database import db
+from models.user import CreateUserModel, PartialUserModel, UpdateUserModel, UserModel, UserPageModel
+from providers.auth_provider import AUTH_MODE, AuthProvider
+from providers.bulk_provider import encode_csv_rows
+from providers.cache_invalidation_provider import user_cache_invalidations
+from providers.cache_provider import token_user_cache
+from providers.pagination_provider import decode_cursor, encode_cursor
+from services.token_service import TOKEN_LOOKUP_STRATEGY, TokenService
+
+
+logger = logging.getLogger(__name__)
+
+#Champs d'un utilisateur pouvant être projetés dans les listes
+USER_LIST_FIELDS = ('email', 'name', 'surname', 'roles')
+
+#Champs lus pour construire un UserModel: le mot de passe n'est lu que par get_user_data_by_email
+USER_PROJECTION = UserModel.document_projection()
 
 
 class UserService:
@@ -19,52 +37,187 @@ class UserService:
         return cls._instance
     
 
-    _user_collection = DatabaseCollection(db = db).user_collection
-
-
-    #Obtenir la liste de tous les utilisateurs
-    async def list_users(self) -> UserCollectionModel:
+    #Collection résolue à chaque accès à partir du client MongoDB courant
+    @property
+    def _user_collection(self):
+        return DatabaseCollection().user_collection
+
+
+    #Construire la projection d'une liste d'utilisateurs (le mot de passe n'est jamais retourné)
+    def _list_projection(self, fields: list[str] = None) -> dict:
+        if not fields:
+            return {field: 1 for field in USER_LIST_FIELDS}
+        unknown_fields = set(fields) - set(USER_LIST_FIELDS)
+        if unknown_fields:
+            raise HTTPException(status_code = 400, detail = f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+        return {field: 1 for field in fields}
+
+
+    #Obtenir une page de la liste des utilisateurs triée par _id (pagination par curseur)
+    async def list_users(
+        self,
+        limit: int = 100,
+        cursor: str = None,
+        fields: list[str] = None,
+        filters: dict = None
+    ) -> UserPageModel:
+        query = dict(filters or {})
+        if cursor is not None:
+            query['_id'] = {'$gt': decode_cursor(cursor)}
+        projection = self._list_projection(fields)
         try:
-            return UserCollectionModel(users = await self._user_collection.find().to_list(length = None))
+            #Récupérer un document de plus pour savoir s'il existe une page suivante
+            users = await self._user_collection.find(query, projection).sort('_id', 1).limit(limit + 1).to_list(length = limit + 1)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting users: {str(e)}")
+        next_cursor = encode_cursor(users[limit - 1]['_id']) if len(users) > limit else None
+        #Les documents viennent de notre collection: la page est construite sans revalidation
+        return UserPageModel.model_construct(
+            users = [PartialUserModel.from_document(user) for user in users[:limit]],
+            next = next_cursor
+        )
+
+
+    #Diffuser les utilisateurs en NDJSON ou en CSV par lots, directement depuis le curseur MongoDB
+    #La projection est validée avant le début de la diffusion
+    def stream_users(
+        self,
+        fields: list[str] = None,
+        filters: dict = None,
+        batch_size: int = 1000,
+        format: str = 'ndjson'
+    ) -> AsyncIterator[str]:
+        projection = self._list_projection(fields)
+        cursor = self._user_collection.find(filters or {}, projection).sort('_id', 1).batch_size(batch_size)
+        if format == 'csv':
+            return self._stream_csv_documents(cursor, ['_id', *projection], batch_size)
+        return self._stream_documents(cursor, batch_size)
+
+
+    async def _stream_documents(self, cursor, batch_size: int) -> AsyncIterator[str]:
+        lines = []
+        async for user in cursor:
+            user['_id'] = str(user['_id'])
+            lines.append(json.dumps(user))
+            if len(lines) >= batch_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+
+    async def _stream_csv_documents(self, cursor, fields: list[str], batch_size: int) -> AsyncIterator[str]:
+        yield encode_csv_rows([], fields, header = True)
+        users = []
+        async for user in cursor:
+            users.append(user)
+            if len(users) >= batch_size:
+                yield encode_csv_rows(users, fields)
+                users = []
+        if users:
+            yield encode_csv_rows(users, fields)
+
+
+    #Importer des utilisateurs par lots à partir de lignes (numéro de ligne, document ou erreur de lecture)
+    #Les mots de passe d'un lot sont hashés en parallèle dans le pool de hashage puis le lot est inséré
+    #avec un insert_many non ordonné: une ligne en erreur n'empêche pas l'insertion des autres
+    async def import_users(self, rows: AsyncIterator[tuple[int, dict | str]], chunk_size: int = 1000) -> dict:
+        report = {'inserted': 0, 'errors': []}
+        chunk = []
+        async for row, document in rows:
+            if isinstance(document, str):
+                report['errors'].append({'row': row, 'detail': document})
+                continue
+            try:
+                chunk.append((row, CreateUserModel(**document)))
+            except ValidationError as e:
+                report['errors'].append({'row': row, 'detail': self._validation_detail(e)})
+                continue
+            if len(chunk) >= chunk_size:
+                await self._insert_users_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            await self._insert_users_chunk(chunk, report)
+        report['errors'].sort(key = lambda error: error['row'])
+        return report
+
+
+    @staticmethod
+    def _validation_detail(error: ValidationError) -> str:
+        return '; '.join(
+            f"{'.'.join(str(location) for location in detail['loc'])}: {detail['msg']}"
+            for detail in error.errors()
+        )
+
+
+    async def _insert_users_chunk(self, chunk: list[tuple[int, CreateUserModel]], report: dict):
+        hashed_passwords = await asyncio.gather(*(AuthProvider.hash_password_async(user.password) for _, user in chunk))
+        documents = [
+            {**user.model_dump(by_alias = True, exclude = ['id', 'password']), 'password': hashed_password}
+            for (_, user), hashed_password in zip(chunk, hashed_passwords)
+        ]
+        try:
+            insert_result = await self._user_collection.insert_many(documents, ordered = False)
+            report['inserted'] += len(insert_result.inserted_ids)
+        except BulkWriteError as e:
+            report['inserted'] += e.details.get('nInserted', 0)
+            #L'index d'une erreur d'écriture est la position du document dans le lot
+            for write_error in e.details.get('writeErrors', []):
+                row = chunk[write_error['index']][0]
+                detail = "Email already exists" if write_error.get('code') == 11000 else write_error.get('errmsg')
+                report['errors'].append({'row': row, 'detail': detail})
+        except Exception as e:
+            for row, _ in chunk:
+                report['errors'].append({'row': row, 'detail': f"Error while inserting user: {str(e)}"})
 
 
     #Ajouter un utilisateur à collection
-    async def create_user(self, user: CreateUserModel):
+    #Retourne l'utilisateur persisté construit à partir de l'inserted_id, sans relire la base de données
+    #Un email déjà utilisé est détecté par l'index unique sur l'email
+    async def create_user(self, user: CreateUserModel) -> UserModel:
         try:
-            await self._user_collection.insert_one(
-                CreateUserModel(
-                    #Décomposer le user en excluant le password puis rajouter le password hashé
-                    **user.model_dump(
-                        by_alias = True,
-                        exclude = ['id', 'password']
-                    ),
-                    password = AuthProvider.hash_password(user.password) #Password hashé
-                ).model_dump(
+            #Hasher le mot de passe dans le pool de hashage
+            hashed_password = await AuthProvider.hash_password_async(user.password)
+            user_data = CreateUserModel(
+                #Décomposer le user en excluant le password puis rajouter le password hashé
+                **user.model_dump(
                     by_alias = True,
-                    exclude = ['id']
-                )
+                    exclude = ['id', 'password']
+                ),
+                password = hashed_password #Password hashé
+            ).model_dump(
+                by_alias = True,
+                exclude = ['id']
             )
+            insert_result = await self._user_collection.insert_one(user_data)
+            user_data['_id'] = insert_result.inserted_id
+            #Les données ont déjà été validées par CreateUserModel
+            return UserModel.from_document(user_data)
+        except DuplicateKeyError:
+            raise HTTPException(status_code = 400, detail = "Email already exists")
+        except HTTPException:
+            raise
         except Exception as e:
-            raise HTTPException(f"Error while inserting user: {str(e)}")
+            raise HTTPException(status_code = 500, detail = f"Error while inserting user: {str(e)}")
 
 
     #Obtenir un utilisateur à partir de son email
     async def get_user_by_email(self, email: str) -> UserModel:
         try:
-            user_data = await self._user_collection.find_one({'email': email})
+            user_data = await self._user_collection.find_one({'email': email}, projection = USER_PROJECTION)
             if user_data is None:
                 return None
-            return UserModel(**user_data)
+            return UserModel.from_document(user_data)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting user: {str(e)}")
 
 
-    #Obtenir un utilisateur sous forme de dictionnaire à partir de son email
-    async def get_user_data_by_email(self, email: str) -> dict:
+    #Obtenir un utilisateur sous forme de dictionnaire à partir de son email, avec son mot de passe hashé
+    #Réservé aux vérifications de mot de passe: les champs lus peuvent être restreints avec fields
+    async def get_user_data_by_email(self, email: str, fields: list[str] = None) -> dict:
+        projection = {field: 1 for field in fields} if fields else UserModel.document_projection('password')
         try:
-            return await self._user_collection.find_one({'email': email})
+            return await self._user_collection.find_one({'email': email}, projection = projection)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting user: {str(e)}")
 
@@ -72,10 +225,10 @@ class UserService:
     #Obtenir un utilisateur à partir de son id
     async def get_user_by_id(self, id: str) -> UserModel:
         try:
-            user_data = await self._user_collection.find_one({'_id': ObjectId(id)})
+            user_data = await self._user_collection.find_one({'_id': ObjectId(id)}, projection = USER_PROJECTION)
             if user_data is None:
                 return None
-            return UserModel(**user_data)
+            return UserModel.from_document(user_data)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting user: {str(e)}")
 
@@ -83,10 +236,10 @@ class UserService:
     #Obtenir un utilisateur à partir de son nom
     async def get_user_by_name(self, name: str) -> UserModel:
         try:
-            user_data = await self._user_collection.find_one({'name': name})
+            user_data = await self._user_collection.find_one({'name': name}, projection = USER_PROJECTION)
             if user_data is None:
                 return None
-            return UserModel(**user_data)
+            return UserModel.from_document(user_data)
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting user: {str(e)}")
 
@@ -94,95 +247,283 @@ class UserService:
     #Récupérer un utilisateur par son jeton d'accès
     async def get_user_by_token(self, token: str) -> UserModel:
         try:
-            #Récupérer le document du jeton dans la base de données
-            access_token = await TokenService().get_access_token(token)
-            if access_token is None:
-                raise HTTPException(401, detail = "Not authorized")
-            #Récupérer l'utilisateur à partir du user_id du token
-            return await self.get_user_by_id(id = access_token.user_id)
+            #Servir l'utilisateur depuis le cache s'il a déjà été résolu pour ce jeton
+            cached_user = token_user_cache.get(token)
+            if cached_user is not None:
+                return cached_user.model_copy(deep = True)
+            if AUTH_MODE in ('jwt', 'refresh'):
+                user = await self.get_user_by_jwt(token)
+            elif TOKEN_LOOKUP_STRATEGY == 'aggregate':
+                #Résoudre le jeton et l'utilisateur en une seule requête
+                user = await self.get_user_by_token_aggregate(token)
+            else:
+                user = await self.get_user_by_token_find(token)
+            if user is not None:
+                #Un utilisateur n'est pas gardé en cache au delà de l'expiration de son jeton
+                ttl = token_user_cache.ttl
+                expires_at = AuthProvider.access_token_expiry(token)
+                if expires_at is not None:
+                    ttl = min(ttl, (expires_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+                if ttl > 0:
+                    token_user_cache.set(token, user.model_copy(deep = True), tag = str(user.id), ttl = ttl)
+            return user
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while getting user: {str(e)}")
 
 
+    #Récupérer un utilisateur par son jeton d'accès avec deux requêtes successives (jeton puis utilisateur)
+    async def get_user_by_token_find(self, token: str) -> UserModel:
+        #Récupérer le document du jeton dans la base de données
+        access_token = await TokenService().get_access_token(token)
+        if access_token is None:
+            raise HTTPException(401, detail = "Not authorized")
+        #Récupérer l'utilisateur à partir du user_id du token
+        return await self.get_user_by_id(id = access_token.user_id)
+
+
+    #Récupérer un utilisateur par son jeton d'accès avec une seule agrégation $lookup
+    async def get_user_by_token_aggregate(self, token: str) -> UserModel:
+        user_data = await TokenService().get_user_data_by_token(token)
+        if user_data is None:
+            raise HTTPException(401, detail = "Not authorized")
+        return UserModel.from_document(user_data)
+
+
+    #Récupérer un utilisateur à partir des claims d'un jeton JWT vérifié localement
+    #En mode 'jwt' seule la liste des jetons révoqués est consultée dans la base de données,
+    #en mode 'refresh' la vérification ne fait aucune requête (le jeton est de courte durée)
+    async def get_user_by_jwt(self, token: str) -> UserModel:
+        claims = AuthProvider.decode_user_access_token(token)
+        if claims is None:
+            return None
+        if AUTH_MODE == 'jwt' and await TokenService().is_access_token_revoked(claims['jti']):
+            return None
+        try:
+            return UserModel(
+                id = claims['uid'],
+                email = claims['sub'],
+                name = claims.get('name'),
+                surname = claims.get('surname'),
+                roles = claims.get('roles'),
+            )
+        except ValidationError:
+            #Jeton signé mais dont les claims ne décrivent pas un utilisateur valide
+            return None
+
+
+    #Invalider les utilisateurs mis en cache après une modification du profil ou des roles
+    #En mode 'jwt' le profil et les roles sont lus dans les claims du jeton: les jetons émis avant la modification
+    #sont révoqués, sinon un utilisateur privé d'un role le garderait jusqu'à l'expiration de son jeton
+    async def _invalidate_user_tokens(self, id: str):
+        await user_cache_invalidations.publish(tags = [id])
+        if AUTH_MODE == 'jwt':
+            await TokenService().delete_access_token_by_user_id(id)
+
+
+    #Champs à mettre à jour: les attributs du modèle qui ne sont pas None (filtrés par pydantic-core)
+    @staticmethod
+    def _update_fields(user: UpdateUserModel) -> dict:
+        return user.model_dump(by_alias = True, exclude_none = True)
+
+
     #Mettre à jour les données d'un utilisateur
     async def update_user(self, id: str, user: UpdateUserModel) -> UserModel:
         try:
-            # Filtrer les attributs du modèle pour ne garder que ceux qui ne sont pas None
-            user_data = {
-                k: v
-                for k, v in user.model_dump(by_alias=True).items()
-                if v is not None
-            }
+            user_data = self._update_fields(user)
 
             # Vérifiez si le password est dans user_data
             if 'password' in user_data:
                 # Hasher le mot de passe
-                user_data['password'] = AuthProvider().hash_password(user_data['password'])
+                user_data['password'] = await AuthProvider.hash_password_async(user_data['password'])
 
             # Vérifiez si user_data n'est pas vide
-            if user_data is None:
+            if not user_data:
                 raise HTTPException(status_code = 400, detail = "No valid fields provided for update")
 
             update_result = await self._user_collection.find_one_and_update(
                 {"_id": ObjectId(id)},
                 {"$set": user_data},
+                projection = USER_PROJECTION,
                 return_document=ReturnDocument.AFTER,
             )
+            #Invalider les utilisateurs mis en cache et les jetons portant l'ancien profil
+            await self._invalidate_user_tokens(id)
             if update_result is None:
                 raise HTTPException(status_code = 404, detail = f"User with id {id} not found")
-            return update_result     
+            return UserModel.from_document(update_result)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while updating user: {str(e)}")
 
 
-    #Supprimer un utilisateur de la base de données
-    async def delete_user(self, id: str):
+    #Rehasher le mot de passe d'un utilisateur avec l'algorithme et le coût configurés
+    #Le filtre sur l'ancien hash évite d'écraser un mot de passe modifié entre temps
+    async def rehash_user_password(self, id: str, password: str, hashed_password: str):
         try:
-            delete_result = await self._user_collection.delete_one({'_id': ObjectId(id)})
-            if delete_result.deleted_count < 1:
-                raise HTTPException(status_code = 404, detail = f"User with id {id} not found")
-            return delete_result
+            await self._user_collection.update_one(
+                {'_id': ObjectId(id), 'password': hashed_password},
+                {'$set': {'password': await AuthProvider.hash_password_async(password)}}
+            )
         except Exception as e:
-            raise HTTPException(status_code = 500, detail = f"Error while deleting user: {str(e)}")
+            logger.warning("Error while rehashing password of user %s: %s", id, e)
+
+
+    #Supprimer un utilisateur et ses jetons d'accès, sans lecture préalable de l'utilisateur
+    async def delete_user(self, id: str) -> dict:
+        report = await self.delete_users(ids = [id])
+        if report['users_deleted'] < 1:
+            raise HTTPException(status_code = 404, detail = f"User with id {id} not found")
+        return report
+
+
+    #Supprimer des utilisateurs à partir d'une liste d'id ou d'un filtre, ainsi que leurs jetons d'accès
+    #Chaque lot est supprimé avec deux delete_many (jetons puis utilisateurs), dans une transaction si demandé
+    #(les transactions nécessitent un replica set)
+    async def delete_users(
+        self,
+        ids: list[str] = None,
+        filters: dict = None,
+        transaction: bool = False,
+        chunk_size: int = 10000
+    ) -> dict:
+        if not ids and not filters:
+            raise HTTPException(status_code = 400, detail = "A list of ids or a filter is required")
+        try:
+            user_ids = [ObjectId(id) for id in ids] if ids else None
+        except Exception:
+            raise HTTPException(status_code = 400, detail = "Invalid user id")
+        report = {'users_deleted': 0, 'tokens_deleted': 0}
+        try:
+            if not transaction:
+                await self._delete_users(user_ids, filters, chunk_size, report)
+                return report
+            async with await self._user_collection.database.client.start_session() as session:
+                async with session.start_transaction():
+                    await self._delete_users(user_ids, filters, chunk_size, report, session = session)
+            return report
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code = 500, detail = f"Error while deleting users: {str(e)}")
+
+
+    async def _delete_users(self, user_ids: list[ObjectId], filters: dict, chunk_size: int, report: dict, session = None):
+        if user_ids is not None:
+            batches = self._listed_user_ids(user_ids, chunk_size)
+        else:
+            batches = self._matching_user_ids(filters, chunk_size, session)
+        async for batch in batches:
+            report['tokens_deleted'] += await TokenService().delete_access_tokens_by_user_ids(batch, session = session)
+            delete_result = await self._user_collection.delete_many({'_id': {'$in': batch}}, session = session)
+            report['users_deleted'] += delete_result.deleted_count
+            await user_cache_invalidations.publish(tags = batch)
+
+
+    #Lire par lots les id des utilisateurs correspondant à un filtre
+    async def _matching_user_ids(self, filters: dict, chunk_size: int, session = None) -> AsyncIterator[list[ObjectId]]:
+        cursor = self._user_collection.find(filters, projection = {'_id': 1}, session = session).batch_size(chunk_size)
+        batch = []
+        async for user in cursor:
+            batch.append(user['_id'])
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+    @staticmethod
+    async def _listed_user_ids(user_ids: list[ObjectId], chunk_size: int) -> AsyncIterator[list[ObjectId]]:
+        for start in range(0, len(user_ids), chunk_size):
+            yield user_ids[start:start + chunk_size]
 
 
     #Supprimer un utilisateur de la base de données à partir de son email
     async def delete_user_by_email(self, email: str):
         try:
-            delete_result = await self._user_collection.delete_one({'email': email})
-            if delete_result.deleted_count < 1:
+            deleted_user = await self._user_collection.find_one_and_delete({'email': email}, projection = {'_id': 1})
+            if deleted_user is None:
                 raise HTTPException(status_code = 404, detail = f"User with email {email} not found")
-            return delete_result
+            await user_cache_invalidations.publish(tags = [deleted_user['_id']])
+            return deleted_user
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while deleting user: {str(e)}")
 
 
-    #Ajouter un role à un utilisateur
-    async def add_role_to_user(self, id: str, role_name: str):
-        try:
-            # Récupérer l'utilisateur par son ID
-            user = await self.get_user_by_id(id)
-
-            if not user:
+    #Ajouter des roles à un utilisateur en une seule opération atomique
+    #Les roles présents avant la mise à jour permettent de distinguer les roles ajoutés des roles déjà attribués
+    async def _add_roles(self, id: str, role_names: list[str]) -> dict:
+        role_names = list(dict.fromkeys(role_names))
+        user_data = None
+        #Une seconde tentative couvre une initialisation concurrente de la liste des roles
+        for _ in range(2):
+            user_data = await self._user_collection.find_one_and_update(
+                {'_id': ObjectId(id), 'roles': {'$type': 'array'}},
+                {'$addToSet': {'roles': {'$each': role_names}}},
+                projection = {'roles': 1},
+                return_document = ReturnDocument.BEFORE,
+            )
+            if user_data is not None:
+                break
+            #La liste des roles n'est pas encore initialisée
+            user_data = await self._user_collection.find_one_and_update(
+                {'_id': ObjectId(id), 'roles': {'$not': {'$type': 'array'}}},
+                {'$set': {'roles': role_names}},
+                projection = {'_id': 1},
+                return_document = ReturnDocument.BEFORE,
+            )
+            if user_data is not None:
+                user_data['roles'] = []
+                break
+            if await self._user_collection.find_one({'_id': ObjectId(id)}, projection = {'_id': 1}) is None:
+                break
+        if user_data is None:
+            raise HTTPException(status_code = 404, detail = "User not found")
+        report = {
+            'added': [role_name for role_name in role_names if role_name not in user_data['roles']],
+            'already_present': [role_name for role_name in role_names if role_name in user_data['roles']],
+        }
+        if report['added']:
+            await self._invalidate_user_tokens(id)
+        return report
+
+
+    #Révoquer des roles à un utilisateur en une seule opération atomique
+    async def _remove_roles(self, id: str, role_names: list[str]) -> dict:
+        role_names = list(dict.fromkeys(role_names))
+        user_data = await self._user_collection.find_one_and_update(
+            {'_id': ObjectId(id), 'roles': {'$type': 'array'}},
+            {'$pull': {'roles': {'$in': role_names}}},
+            projection = {'roles': 1},
+            return_document = ReturnDocument.BEFORE,
+        )
+        if user_data is None:
+            #Un utilisateur sans liste de roles n'a aucun role à révoquer
+            if await self._user_collection.find_one({'_id': ObjectId(id)}, projection = {'_id': 1}) is None:
                 raise HTTPException(status_code = 404, detail = "User not found")
+            user_data = {'roles': []}
+        report = {
+            'removed': [role_name for role_name in role_names if role_name in user_data['roles']],
+            'missing': [role_name for role_name in role_names if role_name not in user_data['roles']],
+        }
+        if report['removed']:
+            await self._invalidate_user_tokens(id)
+        return report
 
-            # Initialiser roles si nécessaire
-            if user.roles is None:
-                user.roles = []
-
-            # Ajouter le rôle si ce n'est pas déjà présent
-            print(user)
-            if role_name not in user.roles:
-                user.roles.append(role_name)
-                await self.update_user(
-                    id = user.id,
-                    user = UpdateUserModel(**user.model_dump())
-                )
-            else:
-                raise HTTPException(status_code = 400, detail = f"Role {role_name} already assigned")
 
-            return {"detail": "Role added successfully"}
+    #Ajouter un role à un utilisateur
+    async def add_role_to_user(self, id: str, role_name: str):
+        try:
+            report = await self._add_roles(id, [role_name])
+            if report['already_present']:
+                return {"detail": f"Role {role_name} already assigned", **report}
+            return {"detail": "Role added successfully", **report}
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while adding role to user: {str(e)}")
 
@@ -190,31 +531,10 @@ class UserService:
     #Ajouter une liste de roles à un tilisateur
     async def add_roles_to_user(self, id: str, role_names: list[str]):
         try:
-            # Récupérer l'utilisateur par son ID
-            user = await self.get_user_by_id(id)
-
-            if not user:
-                raise HTTPException(status_code = 404, detail = "User not found")
-
-            # Initialiser roles si nécessaire
-            if user.roles is None:
-                user.roles = []
-
-            # Ajouter les rôles s'ils ne sont pas déjà présents
-            for role_name in role_names:
-                if role_name not in user.roles:
-                    user.roles.append(role_name)
-                else:
-                    raise HTTPException(status_code = 400, detail = f"Role '{role_name}' already assigned")
-
-            # Mettre à jour l'utilisateur
-            await self.update_user(
-                id = user.id,
-                user = UpdateUserModel(**user.model_dump())
-            )
-
-            return {"detail": "Roles added successfully"}
+            return {"detail": "Roles added successfully", **await self._add_roles(id, role_names)}
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error while adding roles to user: {str(e)}")
 
@@ -222,59 +542,26 @@ class UserService:
     #Supprimer un role à un utilisateur
     async def remove_role_from_user(self, id: str, role_name: str):
         try:
-            # Récupérer l'utilisateur par son ID
-            user = await self.get_user_by_id(id)
-
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-
-            # Vérifier si le rôle est présent
-            if role_name in user.roles:
-                user.roles.remove(role_name)  # Supprimer le rôle
-            else:
-                raise HTTPException(status_code = 400, detail = f"Role '{role_name}' not assigned")
-
-            # Mettre à jour l'utilisateur
-            await self.update_user(
-                id = user.id,
-                user = UpdateUserModel(**user.model_dump())
-            )
-
-            return {"detail": "Role removed successfully"}
+            report = await self._remove_roles(id, [role_name])
+            if report['missing']:
+                return {"detail": f"Role '{role_name}' not assigned", **report}
+            return {"detail": "Role removed successfully", **report}
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code = 500, detail = f"Error while removing role from user: {str(e)}")
 
 
-
     #Revoquer une liste de roles à un utilisateur
     async def remove_roles_from_user(self, id: str, role_names: list[str]):
         try:
-            # Récupérer l'utilisateur par son ID
-            user = await self.get_user_by_id(id)
-
-            if not user:
-                raise HTTPException(status_code = 404, detail = "User not found")
-
-            # Initialiser une liste pour les rôles manquants
-            missing_roles = []
-
-            # Supprimer les rôles s'ils sont présents
-            for role_name in role_names:
-                if role_name in user.roles:
-                    user.roles.remove(role_name)
-                else:
-                    missing_roles.append(role_name)
-
-            # Mettre à jour l'utilisateur
-            await self.update_user(
-                id = user.id,
-                user=UpdateUserModel(**user.model_dump())
-            )
-
-            if missing_roles:
-                return {"detail": "Roles removed successfully", "missing_roles": missing_roles}
-            return {"detail": "Roles removed successfully"}
+            report = await self._remove_roles(id, role_names)
+            if report['missing']:
+                return {"detail": "Roles removed successfully", "missing_roles": report['missing'], **report}
+            return {"detail": "Roles removed successfully", **report}
 
+        except HTTPException:
+            raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error while removing roles from user: {str(e)}") 
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Error while removing roles from user: {str(e)}")
\ No newline at end of file
@@ -1,4 +1,5 @@
 from fastapi.testclient import TestClient
+from pydantic import SecretStr
 
 from main import app
 
@@ -9,4 +10,16 @@ client = TestClient(app)
 def test_root():
     response = client.get('/')
     assert response.status_code == 200
-    assert response.json() == {"message": "EPL Concours API!"}
\ No newline at end of file
+    assert response.json() == {"message": "EPL Concours API!"}
+
+def test_metrics_is_disabled_by_default():
+    assert client.get('/metrics').status_code == 404
+
+def test_metrics_requires_token(monkeypatch):
+    monkeypatch.setattr('dependencies.auth.METRICS_ENABLED', True)
+    monkeypatch.setattr('dependencies.auth.METRICS_TOKEN', SecretStr('metrics-token'))
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers = {'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers = {'Authorization': 'Bearer metrics-token'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
\ No newline at end of file
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from models.role import RoleModel
+from providers.role_registry_provider import ROLE_CHANGE_PIPELINE, role_registry
+from services.role_service import RoleService
+
+
+@pytest.fixture()
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()['api_test']
+    monkeypatch.setattr('dependencies.db_collections.get_database', lambda: db)
+    asyncio.run(db.user_roles.insert_many([
+        {'name': 'admin', 'description': 'Administrator'},
+        {'name': 'superadmin', 'description': 'Super administrator'},
+    ]))
+    yield db
+    role_registry.clear()
+    role_registry.loaded = False
+
+
+def test_roles_served_from_registry(mock_db):
+    async def scenario():
+        await role_registry.start(mock_db.user_roles)
+        try:
+            await RoleService().create_role(RoleModel(name = 'simple_user', description = 'A simple user'))
+            #Le registre ne consulte plus la base de données
+            await mock_db.user_roles.delete_many({'name': 'admin'})
+            admin = await RoleService().get_role('admin')
+            simple_user = await RoleService().get_role('simple_user')
+            by_id = await RoleService().get_role_by_id(simple_user.id)
+            page = await RoleService().list_roles(offset = 1, limit = 1)
+            return admin, simple_user, by_id, page
+        finally:
+            await role_registry.stop()
+    admin, simple_user, by_id, page = asyncio.run(scenario())
+    assert admin.name == 'admin'
+    assert simple_user.id is not None
+    assert by_id.name == 'simple_user'
+    assert [role.name for role in page.roles] == ['superadmin']
+
+def test_registry_write_through_on_delete(mock_db):
+    async def scenario():
+        await role_registry.load(mock_db.user_roles)
+        await RoleService().delete_role('admin')
+        return await RoleService().get_role('admin'), await RoleService().list_roles()
+    admin, roles = asyncio.run(scenario())
+    assert admin is None
+    assert [role.name for role in roles.roles] == ['superadmin']
+
+def test_registry_apply_change():
+    role_registry.apply_change({
+        'operationType': 'insert',
+        'fullDocument': {'_id': '60d5ec49a4b4c3e7b4f4e3b2', 'name': 'editor', 'description': 'Editor'},
+    })
+    assert role_registry.get('editor').description == 'Editor'
+    role_registry.apply_change({'operationType': 'delete', 'documentKey': {'_id': '60d5ec49a4b4c3e7b4f4e3b2'}})
+    assert role_registry.get('editor') is None
+
+def test_registry_apply_projected_change(mock_db):
+    role_id = '60d5ec49a4b4c3e7b4f4e3b2'
+    async def project(change: dict) -> dict:
+        await mock_db.role_changes.insert_one(change)
+        projected = await mock_db.role_changes.aggregate(ROLE_CHANGE_PIPELINE).to_list(length = None)
+        await mock_db.role_changes.delete_many({})
+        return projected[0]
+    insert_change = asyncio.run(project({
+        'operationType': 'insert',
+        'documentKey': {'_id': role_id},
+        'fullDocument': {'_id': role_id, 'name': 'editor', 'description': 'Editor'},
+    }))
+    role_registry.apply_change(insert_change)
+    assert role_registry.get_by_id(role_id).name == 'editor'
+    delete_change = asyncio.run(project({'operationType': 'delete', 'documentKey': {'_id': role_id}}))
+    role_registry.apply_change(delete_change)
+    assert role_registry.list() == []
+
+def test_get_roles_by_names(mock_db):
+    found, missing = asyncio.run(RoleService().get_roles_by_names(['admin', 'viewer', 'admin', 'superadmin']))
+    assert found == ['admin', 'superadmin']
+    assert missing == ['viewer']
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import datetime
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from config.settings import get_settings
+from models.user import UserModel
+from providers.cache_provider import token_user_cache
+from services.token_service import TokenService
+
+
+@pytest.fixture()
+def mock_db(monkeypatch):
+    monkeypatch.setenv('SECRET_KEY', 'test_secret_key')
+    monkeypatch.setenv('ALGORITHM', 'HS256')
+    get_settings.cache_clear()
+    db = AsyncMongoMockClient()['api_test']
+    monkeypatch.setattr('dependencies.db_collections.get_database', lambda: db)
+    yield db
+    token_user_cache.clear()
+    get_settings.cache_clear()
+
+
+user = UserModel(
+    _id = str(ObjectId()),
+    email = 'jdoe@example.com',
+    name = 'John',
+    surname = 'Doe',
+    roles = ['admin']
+)
+
+
+def test_issue_access_token_stores_expiry(mock_db):
+    access_token = asyncio.run(TokenService().issue_access_token(user))
+    assert access_token.expires_at > datetime.datetime.now(datetime.timezone.utc)
+    token_data = asyncio.run(mock_db.user_access_tokens.find_one({'token': access_token.token}))
+    assert token_data['expires_at'] is not None
+
+def test_session_cap_evicts_oldest_tokens(mock_db, monkeypatch):
+    monkeypatch.setattr('services.token_service.MAX_SESSIONS_PER_USER', 2)
+    tokens = [asyncio.run(TokenService().issue_access_token(user)).token for _ in range(3)]
+    remaining = asyncio.run(mock_db.user_access_tokens.find({}, projection = {'token': 1}).to_list(length = None))
+    assert {token['token'] for token in remaining} == set(tokens[1:])
+
+def test_session_cap_evicts_by_issue_date(mock_db, monkeypatch):
+    monkeypatch.setattr('services.token_service.MAX_SESSIONS_PER_USER', 2)
+    asyncio.run(TokenService().issue_access_token(user))
+    #Jeton inséré après le premier mais émis avant lui (horloge d'un autre worker en retard)
+    asyncio.run(mock_db.user_access_tokens.insert_one({
+        'token': 'late', 'user_id': ObjectId(user.id), 'issued_at': datetime.datetime(2000, 1, 1)
+    }))
+    latest = asyncio.run(TokenService().issue_access_token(user)).token
+    remaining = asyncio.run(mock_db.user_access_tokens.find({}, projection = {'token': 1}).to_list(length = None))
+    assert len(remaining) == 2
+    assert 'late' not in {token['token'] for token in remaining}
+    assert latest in {token['token'] for token in remaining}
+
+def test_expired_token_is_rejected(mock_db):
+    asyncio.run(mock_db.user_access_tokens.insert_many([
+        {'token': 'expired', 'user_id': ObjectId(user.id), 'expires_at': datetime.datetime(2000, 1, 1)},
+        {'token': 'legacy', 'user_id': ObjectId(user.id)},
+    ]))
+    assert asyncio.run(TokenService().get_access_token('expired')) is None
+    assert asyncio.run(TokenService().get_access_token('legacy')) is not None
+
+def test_refresh_token_rotation_and_reuse_detection(mock_db, monkeypatch):
+    monkeypatch.setattr('services.token_service.AUTH_MODE', 'refresh')
+    access_token, refresh_token = asyncio.run(TokenService().issue_tokens(user))
+    assert refresh_token is not None
+    assert asyncio.run(mock_db.user_access_tokens.count_documents({})) == 0
+    assert asyncio.run(mock_db.user_refresh_tokens.find_one({'token_hash': refresh_token})) is None
+    user_id, rotated_token = asyncio.run(TokenService().rotate_refresh_token(refresh_token))
+    assert user_id == user.id
+    #Réutiliser le jeton déjà échangé révoque toute la famille, y compris le jeton issu de la rotation
+    with pytest.raises(HTTPException):
+        asyncio.run(TokenService().rotate_refresh_token(refresh_token))
+    with pytest.raises(HTTPException):
+        asyncio.run(TokenService().rotate_refresh_token(rotated_token))
\ No newline at end of file
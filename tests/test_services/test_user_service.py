@@ -0,0 +1,213 @@
+import asyncio
+import json
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from config.settings import get_settings
+from dependencies.auth import admin_role_dependency, auth_dependency
+from dependencies.db_indexes import ensure_indexes
+from models.user import CreateUserModel
+from providers.auth_provider import AuthProvider
+from providers.cache_provider import token_user_cache
+from services.token_service import TokenService
+from services.user_service import UserService
+
+
+@pytest.fixture()
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()['api_test']
+    monkeypatch.setattr('dependencies.db_collections.get_database', lambda: db)
+    asyncio.run(db.users.insert_many([
+        {
+            '_id': ObjectId(),
+            'email': f"user{i}@example.com",
+            'name': 'John',
+            'surname': 'Doe' if i % 2 else 'Smith',
+            'password': 'hashed',
+            'roles': ['simple_user'],
+        }
+        for i in range(5)
+    ]))
+    return db
+
+
+def test_list_users_pagination(mock_db):
+    first_page = asyncio.run(UserService().list_users(limit = 2))
+    assert [user.email for user in first_page.users] == ['user0@example.com', 'user1@example.com']
+    assert first_page.next is not None
+    second_page = asyncio.run(UserService().list_users(limit = 2, cursor = first_page.next))
+    assert [user.email for user in second_page.users] == ['user2@example.com', 'user3@example.com']
+    last_page = asyncio.run(UserService().list_users(limit = 2, cursor = second_page.next))
+    assert [user.email for user in last_page.users] == ['user4@example.com']
+    assert last_page.next is None
+
+def test_list_users_projection_and_filters(mock_db):
+    page = asyncio.run(UserService().list_users(fields = ['email'], filters = {'surname': 'Doe'}))
+    assert [user.email for user in page.users] == ['user1@example.com', 'user3@example.com']
+    assert page.users[0].model_dump(exclude_unset = True).keys() == {'id', 'email'}
+
+def test_list_users_unknown_field(mock_db):
+    with pytest.raises(HTTPException):
+        asyncio.run(UserService().list_users(fields = ['password']))
+
+def test_stream_users(mock_db):
+    async def collect():
+        return [chunk async for chunk in UserService().stream_users(batch_size = 2)]
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 3
+    users = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert len(users) == 5
+    assert all('password' not in user for user in users)
+
+def test_add_and_remove_roles(mock_db):
+    user_id = asyncio.run(mock_db.users.find_one({'email': 'user0@example.com'}))['_id']
+    asyncio.run(mock_db.users.update_one({'_id': user_id}, {'$set': {'roles': None}}))
+    asyncio.run(UserService().add_roles_to_user(id = str(user_id), role_names = ['admin', 'editor']))
+    result = asyncio.run(UserService().add_roles_to_user(id = str(user_id), role_names = ['admin', 'superadmin']))
+    assert result['added'] == ['superadmin']
+    assert result['already_present'] == ['admin']
+    user = asyncio.run(mock_db.users.find_one({'_id': user_id}))
+    assert user['roles'] == ['admin', 'editor', 'superadmin']
+    result = asyncio.run(UserService().remove_roles_from_user(id = str(user_id), role_names = ['editor', 'viewer']))
+    assert result['missing_roles'] == ['viewer']
+    user = asyncio.run(mock_db.users.find_one({'_id': user_id}))
+    assert user['roles'] == ['admin', 'superadmin']
+
+def test_add_roles_to_missing_user(mock_db):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(UserService().add_roles_to_user(id = str(ObjectId()), role_names = ['admin']))
+    assert error.value.status_code == 404
+
+def test_single_role_operations(mock_db):
+    user_id = str(asyncio.run(mock_db.users.find_one({'email': 'user1@example.com'}))['_id'])
+    assert asyncio.run(UserService().add_role_to_user(id = user_id, role_name = 'admin'))['added'] == ['admin']
+    assert asyncio.run(UserService().add_role_to_user(id = user_id, role_name = 'admin'))['already_present'] == ['admin']
+    assert asyncio.run(UserService().remove_role_from_user(id = user_id, role_name = 'admin'))['removed'] == ['admin']
+    assert asyncio.run(UserService().remove_role_from_user(id = user_id, role_name = 'admin'))['missing'] == ['admin']
+
+def test_concurrent_role_additions(mock_db):
+    user_id = str(asyncio.run(mock_db.users.find_one({'email': 'user2@example.com'}))['_id'])
+    async def add_concurrently():
+        return await asyncio.gather(*(
+            UserService().add_role_to_user(id = user_id, role_name = role_name)
+            for role_name in ['a', 'b', 'c', 'a']
+        ))
+    asyncio.run(add_concurrently())
+    user = asyncio.run(mock_db.users.find_one({'email': 'user2@example.com'}))
+    assert sorted(user['roles']) == ['a', 'b', 'c', 'simple_user']
+
+def test_create_user_returns_persisted_user(mock_db):
+    asyncio.run(mock_db.users.create_index('email', unique = True))
+    user = asyncio.run(UserService().create_user(
+        CreateUserModel(email = 'new@example.com', name = 'Jane', surname = 'Doe', password = '12345678')
+    ))
+    assert user.id == str(asyncio.run(mock_db.users.find_one({'email': 'new@example.com'}))['_id'])
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(UserService().create_user(
+            CreateUserModel(email = 'new@example.com', name = 'Jane', surname = 'Doe', password = '12345678')
+        ))
+    assert error.value.status_code == 400
+
+def test_user_reads_are_projected(mock_db):
+    asyncio.run(mock_db.users.update_one({'email': 'user0@example.com'}, {'$set': {'profile': {'bio': 'x' * 1000}}}))
+    user_data = asyncio.run(UserService().get_user_data_by_email('user0@example.com'))
+    assert user_data.keys() == {'_id', 'email', 'name', 'surname', 'roles', 'password'}
+    user_data = asyncio.run(UserService().get_user_data_by_email('user0@example.com', fields = ['password']))
+    assert user_data.keys() == {'_id', 'password'}
+    user = asyncio.run(UserService().get_user_by_email('user0@example.com'))
+    assert user.model_fields_set == {'id', 'email', 'name', 'surname', 'roles'}
+
+def test_import_users_reports_row_errors(mock_db):
+    asyncio.run(mock_db.users.create_index('email', unique = True))
+    async def rows():
+        yield 1, {'email': 'new@example.com', 'name': 'Jane', 'surname': 'Doe', 'password': '12345678'}
+        yield 2, {'email': 'user0@example.com', 'name': 'John', 'surname': 'Doe', 'password': '12345678'}
+        yield 3, {'email': 'invalid', 'name': 'Jane', 'surname': 'Doe', 'password': '12345678'}
+        yield 4, "Invalid JSON"
+        yield 5, {'email': 'other@example.com', 'name': 'Jack', 'surname': 'Doe', 'password': '12345678'}
+    report = asyncio.run(UserService().import_users(rows(), chunk_size = 2))
+    assert report['inserted'] == 2
+    assert [error['row'] for error in report['errors']] == [2, 3, 4]
+    assert report['errors'][0]['detail'] == "Email already exists"
+    assert asyncio.run(mock_db.users.count_documents({})) == 7
+
+def test_export_users_csv(mock_db):
+    async def collect():
+        return ''.join([chunk async for chunk in UserService().stream_users(fields = ['email', 'roles'], batch_size = 2, format = 'csv')])
+    lines = asyncio.run(collect()).splitlines()
+    assert lines[0] == '_id,email,roles'
+    assert len(lines) == 6
+    assert lines[1].endswith(',user0@example.com,simple_user')
+
+def test_delete_users_by_ids_and_filter(mock_db):
+    users = asyncio.run(mock_db.users.find({}, projection = {'_id': 1}).sort('_id', 1).to_list(length = None))
+    asyncio.run(mock_db.user_access_tokens.insert_many([
+        {'token': f"token-{i}", 'user_id': user['_id']} for i, user in enumerate(users)
+    ]))
+    report = asyncio.run(UserService().delete_users(ids = [str(users[0]['_id']), str(users[1]['_id'])], chunk_size = 1))
+    assert report == {'users_deleted': 2, 'tokens_deleted': 2}
+    report = asyncio.run(UserService().delete_users(filters = {'surname': 'Doe'}))
+    assert report == {'users_deleted': 1, 'tokens_deleted': 1}
+    assert asyncio.run(mock_db.users.count_documents({})) == 2
+    assert asyncio.run(mock_db.user_access_tokens.count_documents({})) == 2
+
+def test_delete_users_requires_ids_or_filter(mock_db):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(UserService().delete_users(filters = {}))
+    assert error.value.status_code == 400
+
+def test_delete_missing_user(mock_db):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(UserService().delete_user(str(ObjectId())))
+    assert error.value.status_code == 404
+
+def test_demoted_user_token_is_revoked_in_jwt_mode(mock_db, monkeypatch):
+    monkeypatch.setenv('SECRET_KEY', 'test_secret_key')
+    monkeypatch.setenv('ALGORITHM', 'HS256')
+    get_settings.cache_clear()
+    monkeypatch.setattr('services.user_service.AUTH_MODE', 'jwt')
+    monkeypatch.setattr('services.token_service.AUTH_MODE', 'jwt')
+    user_id = asyncio.run(mock_db.users.find_one({'email': 'user0@example.com'}))['_id']
+    asyncio.run(mock_db.users.update_one({'_id': user_id}, {'$set': {'roles': ['admin']}}))
+    async def authorize(token: str):
+        return await admin_role_dependency(await auth_dependency(token))
+    async def scenario():
+        user = await UserService().get_user_by_id(str(user_id))
+        access_token = await TokenService().issue_access_token(user)
+        admin = await authorize(access_token.token)
+        await UserService().remove_role_from_user(str(user_id), 'admin')
+        return admin, access_token.token
+    try:
+        admin, token = asyncio.run(scenario())
+        assert admin.roles == ['admin']
+        #Le jeton émis avant la révocation du role n'est plus accepté
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(authorize(token))
+        assert error.value.status_code == 401
+    finally:
+        token_user_cache.clear()
+        get_settings.cache_clear()
+
+def test_register_same_email_twice(mock_db):
+    asyncio.run(ensure_indexes(mock_db, mode = 'create'))
+    user = CreateUserModel(email = 'new@example.com', name = 'John', surname = 'Doe', password = 'password')
+    asyncio.run(UserService().create_user(user))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(UserService().create_user(user))
+    assert error.value.status_code == 400
+    assert asyncio.run(mock_db.users.count_documents({'email': 'new@example.com'})) == 1
+
+def test_incomplete_jwt_claims_are_unauthorized(mock_db, monkeypatch):
+    monkeypatch.setenv('SECRET_KEY', 'test_secret_key')
+    monkeypatch.setenv('ALGORITHM', 'HS256')
+    get_settings.cache_clear()
+    monkeypatch.setattr('services.user_service.AUTH_MODE', 'jwt')
+    try:
+        #Un jeton signé sans nom ni prénom ne décrit pas un utilisateur valide
+        token = AuthProvider.create_user_access_token({'sub': 'user0@example.com', 'uid': str(ObjectId())})
+        assert asyncio.run(UserService().get_user_by_token(token)) is None
+    finally:
+        token_user_cache.clear()
+        get_settings.cache_clear()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import datetime
+import pytest
+
+from config.settings import get_settings
+from models.user import UserModel
+from providers.auth_provider import AuthProvider
+
+
+@pytest.fixture(autouse = True)
+def jwt_env(monkeypatch):
+    monkeypatch.setenv('SECRET_KEY', 'test_secret_key')
+    monkeypatch.setenv('ALGORITHM', 'HS256')
+    #Les paramètres sont relus avec les variables du test
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+user = UserModel(
+    _id = '60d5ec49a4b4c3e7b4f4e3b2',
+    email = 'jdoe@example.com',
+    name = 'John',
+    surname = 'Doe',
+    roles = ['admin']
+)
+
+
+def test_access_token_claims():
+    token = AuthProvider.create_user_access_token(AuthProvider.user_token_claims(user))
+    claims = AuthProvider.decode_user_access_token(token)
+    assert claims['sub'] == user.email
+    assert claims['uid'] == user.id
+    assert claims['roles'] == user.roles
+    assert 'jti' in claims and 'exp' in claims
+
+def test_access_tokens_are_unique():
+    claims = AuthProvider.user_token_claims(user)
+    assert AuthProvider.create_user_access_token(claims) != AuthProvider.create_user_access_token(claims)
+
+def test_expired_access_token():
+    token = AuthProvider.create_user_access_token(
+        AuthProvider.user_token_claims(user),
+        expires_delta = datetime.timedelta(seconds = -1)
+    )
+    assert AuthProvider.decode_user_access_token(token) is None
+
+def test_tampered_access_token():
+    token = AuthProvider.create_user_access_token(AuthProvider.user_token_claims(user))
+    assert AuthProvider.decode_user_access_token(token[:-2]) is None
\ No newline at end of file
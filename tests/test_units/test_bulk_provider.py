@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+
+from providers.bulk_provider import encode_csv_rows, read_csv_rows, read_ndjson_rows
+
+
+async def body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+def collect(rows):
+    async def run():
+        return [row async for row in rows]
+    return asyncio.run(run())
+
+
+def test_read_ndjson_rows_across_chunks():
+    rows = collect(read_ndjson_rows(body(b'{"email": "a@example.com"}\n{"ema', b'il": "b@example.com"}\n\nnot json\n[1]')))
+    assert rows[0] == (1, {'email': 'a@example.com'})
+    assert rows[1] == (2, {'email': 'b@example.com'})
+    assert rows[2][0] == 3 and rows[2][1].startswith("Invalid JSON")
+    assert rows[3] == (4, "A JSON object is expected")
+
+def test_read_csv_rows():
+    rows = collect(read_csv_rows(body(b'email,name,roles\r\na@example.com,"Doe, John",admin;simple_user\r\nb@example.com\r\n')))
+    assert rows[0] == (1, {'email': 'a@example.com', 'name': 'Doe, John', 'roles': ['admin', 'simple_user']})
+    assert rows[1] == (2, "Expected 3 columns, got 1")
+
+def test_encode_csv_rows():
+    csv_rows = encode_csv_rows([{'email': 'a@example.com', 'roles': ['admin', 'simple_user']}], ['email', 'name', 'roles'], header = True)
+    assert csv_rows == 'email,name,roles\na@example.com,,admin;simple_user\n'
+
+def test_csv_round_trip_with_embedded_newline_and_comma():
+    documents = [
+        {'email': 'a@example.com', 'name': 'Doe, John\nSecond line', 'roles': ['admin', 'simple_user']},
+        {'email': 'b@example.com', 'name': 'Smith', 'roles': ['simple_user']},
+    ]
+    exported = encode_csv_rows(documents, ['email', 'name', 'roles'], header = True).encode('utf-8')
+    #Le corps est découpé au milieu du champ sur plusieurs lignes
+    split = exported.index(b'Second')
+    rows = collect(read_csv_rows(body(exported[:split], exported[split:])))
+    assert rows == [(1, documents[0]), (2, documents[1])]
+
+def test_read_csv_rows_unterminated_quote():
+    rows = collect(read_csv_rows(body(b'email,name\na@example.com,"Doe\n')))
+    assert rows == [(1, "Unterminated quoted field")]
+
+def test_invalid_utf8_lines_are_row_errors():
+    ndjson_rows = collect(read_ndjson_rows(body(b'{"email": "a@example.com"}\n{"name": "\xff"}\n{"email": "b@example.com"}\n')))
+    assert ndjson_rows[1][0] == 2 and ndjson_rows[1][1].startswith("Invalid UTF-8")
+    assert ndjson_rows[2] == (3, {'email': 'b@example.com'})
+    csv_rows = collect(read_csv_rows(body(b'email,name\na@example.com,\xff\nb@example.com,Doe\n')))
+    assert csv_rows[0][0] == 1 and csv_rows[0][1].startswith("Invalid UTF-8")
+    assert csv_rows[1] == (2, {'email': 'b@example.com', 'name': 'Doe'})
+    with pytest.raises(HTTPException) as error:
+        collect(read_csv_rows(body(b'email,\xff\na@example.com,Doe\n')))
+    assert error.value.status_code == 400
+
+def test_encode_csv_rows_escapes_formulas():
+    csv_rows = encode_csv_rows([{'name': '=HYPERLINK("http://x")', 'surname': '-1+2', 'email': 'a@example.com'}], ['email', 'name', 'surname'])
+    assert csv_rows == 'a@example.com,"\'=HYPERLINK(""http://x"")",\'-1+2\n'
\ No newline at end of file
@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import patch
+from mongomock_motor import AsyncMongoMockClient
+
+from providers.cache_invalidation_provider import CacheInvalidations
+from providers.cache_provider import TTLCache
+
+
+def test_get_and_set():
+    cache = TTLCache(maxsize = 2, ttl = 60)
+    assert cache.get('token') is None
+    cache.set('token', 'user')
+    assert cache.get('token') == 'user'
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize = 2, ttl = 60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    #Marquer 'a' comme récemment utilisé
+    cache.get('a')
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+def test_ttl_expiration():
+    cache = TTLCache(maxsize = 2, ttl = 10)
+    with patch('providers.cache_provider.time.monotonic', return_value = 100):
+        cache.set('token', 'user')
+    with patch('providers.cache_provider.time.monotonic', return_value = 111):
+        assert cache.get('token') is None
+    assert len(cache) == 0
+
+def test_invalidate_tag():
+    cache = TTLCache(maxsize = 10, ttl = 60)
+    cache.set('token1', 'user', tag = 'user_id')
+    cache.set('token2', 'user', tag = 'user_id')
+    cache.set('token3', 'other', tag = 'other_id')
+    assert cache.invalidate_tag('user_id') == 2
+    assert 'token1' not in cache and 'token2' not in cache
+    assert cache.get('token3') == 'other'
+
+def test_invalidations_reach_other_workers():
+    collection = AsyncMongoMockClient()['api_test'].user_cache_invalidations
+    async def scenario():
+        worker_a = CacheInvalidations(TTLCache(), interval = 3600)
+        worker_b = CacheInvalidations(TTLCache(), interval = 3600)
+        worker_a.start(collection)
+        worker_b.start(collection)
+        try:
+            worker_b.cache.set('token', 'user', tag = 'user_id')
+            worker_b.cache.set('other_token', 'other_user', tag = 'other_user_id')
+            await worker_a.publish(tags = ['user_id'])
+            #L'entrée reste servie par l'autre worker jusqu'à sa prochaine lecture des invalidations
+            stale = 'token' in worker_b.cache
+            applied = await worker_b.poll_once()
+            replayed = await worker_b.poll_once()
+            own = await worker_a.poll_once()
+            return stale, applied, replayed, own, worker_b.cache
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+    stale, applied, replayed, own, cache = asyncio.run(scenario())
+    assert stale
+    assert (applied, replayed, own) == (1, 0, 0)
+    assert 'token' not in cache
+    assert 'other_token' in cache
\ No newline at end of file
@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import ASCENDING, IndexModel
+
+from dependencies.db_indexes import INDEXES, diff_indexes, ensure_indexes, require_indexes
+
+
+def test_diff_indexes():
+    desired = [
+        IndexModel([('email', ASCENDING)], name = 'email_unique', unique = True),
+        IndexModel([('name', ASCENDING)], name = 'name'),
+    ]
+    existing = {
+        '_id_': {'key': [('_id', 1)]},
+        'email_1': {'key': [('email', 1)]},
+        'surname_1': {'key': [('surname', 1)]},
+    }
+    diff = diff_indexes(desired, existing)
+    assert [index.document['name'] for index in diff['missing']] == ['name']
+    assert [index.document['name'] for index in diff['drifted']] == ['email_unique']
+    assert diff['extra'] == ['surname_1']
+
+def test_ensure_indexes_creates_registry():
+    db = AsyncMongoMockClient()['api_test']
+    report = asyncio.run(ensure_indexes(db, mode = 'create'))
+    for collection_name, indexes in INDEXES.items():
+        assert sorted(report[collection_name]['created']) == sorted(index.document['name'] for index in indexes)
+    #Un second passage ne doit rien recréer
+    report = asyncio.run(ensure_indexes(db, mode = 'create'))
+    assert all(not collection_report['created'] for collection_report in report.values())
+
+def test_require_indexes():
+    db = AsyncMongoMockClient()['api_test']
+    #Avec INDEX_MANAGEMENT=off, aucun index n'est créé et l'application ne doit pas démarrer
+    asyncio.run(ensure_indexes(db, mode = 'off'))
+    with pytest.raises(RuntimeError, match = 'users.email_unique'):
+        asyncio.run(require_indexes(db))
+    #Un index non unique sur l'email ne suffit pas
+    asyncio.run(db.users.create_index([('email', ASCENDING)], name = 'email_unique'))
+    with pytest.raises(RuntimeError):
+        asyncio.run(require_indexes(db))
+    asyncio.run(db.users.drop_index('email_unique'))
+    asyncio.run(ensure_indexes(db, mode = 'create'))
+    asyncio.run(require_indexes(db))
\ No newline at end of file
@@ -0,0 +1,42 @@
+import pytest
+from bson import ObjectId
+
+from models.role import RoleModel
+from models.user import PartialUserModel, UserModel
+
+
+def test_from_document_matches_validation():
+    document = {
+        '_id': ObjectId(),
+        'email': 'jdoe@example.com',
+        'name': 'John',
+        'surname': 'Doe',
+        'password': 'hashed',
+        'roles': ['simple_user'],
+    }
+    user = UserModel.from_document(document)
+    assert user.id == str(document['_id'])
+    assert user == UserModel(**document)
+    assert 'password' not in user.model_dump()
+
+def test_from_document_sets_defaults_and_fields_set():
+    document = {'_id': ObjectId(), 'email': 'jdoe@example.com', 'name': 'John', 'surname': 'Doe'}
+    user = UserModel.from_document(document)
+    assert user.roles is None
+    assert user.model_fields_set == {'id', 'email', 'name', 'surname'}
+
+def test_from_document_partial_model_dump():
+    document = {'_id': ObjectId(), 'email': 'jdoe@example.com'}
+    user = PartialUserModel.from_document(document)
+    assert user.model_dump_json(by_alias = True, exclude_unset = True) == (
+        '{"_id":"%s","email":"jdoe@example.com"}' % document['_id']
+    )
+
+def test_from_document_role():
+    role = RoleModel.from_document({'_id': ObjectId(), 'name': 'admin', 'description': 'Administrator'})
+    assert role.name == 'admin'
+    assert isinstance(role.id, str)
+
+def test_from_document_requires_required_fields():
+    with pytest.raises(ValueError, match = 'name, surname'):
+        UserModel.from_document({'_id': ObjectId(), 'email': 'jdoe@example.com'})
\ No newline at end of file
@@ -0,0 +1,24 @@
+import asyncio
+
+from providers.auth_provider import AuthProvider
+from providers.hash_pool_provider import HashPool
+
+
+def test_hash_pool_runs_function():
+    pool = HashPool(kind = 'thread', size = 2, concurrency = 2)
+    async def run_all():
+        return await asyncio.gather(*(pool.run(pow, 2, i) for i in range(5)))
+    assert asyncio.run(run_all()) == [1, 2, 4, 8, 16]
+    metrics = pool.metrics.snapshot()
+    assert metrics['operations'] == 5
+    assert metrics['in_flight'] == 0
+    pool.shutdown()
+
+def test_async_password_hashing():
+    async def hash_and_check():
+        hashed_password = await AuthProvider.hash_password_async('12345678')
+        return (
+            await AuthProvider.check_password_async('12345678', hashed_password),
+            await AuthProvider.check_password_async('87654321', hashed_password),
+        )
+    assert asyncio.run(hash_and_check()) == (True, False)
\ No newline at end of file
@@ -0,0 +1,52 @@
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+
+from dependencies.instrumentation import InstrumentationMiddleware
+from providers.metrics_provider import Histogram, RequestMetrics, add_timing, current_timings
+
+
+def test_histogram_cumulative_buckets():
+    histogram = Histogram('latency_seconds', "Latency", (0.1, 1.0), ('route',))
+    histogram.observe(0.05, '/')
+    histogram.observe(0.1, '/')
+    histogram.observe(2.0, '/')
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/"} 3' in lines
+
+def test_middleware_records_route_template(monkeypatch):
+    metrics = RequestMetrics()
+    monkeypatch.setattr('dependencies.instrumentation.request_metrics', metrics)
+    app = FastAPI()
+    app.add_middleware(InstrumentationMiddleware)
+
+    @app.get('/items/{id}')
+    async def item(id: str):
+        add_timing('auth', 0.002)
+        return {'id': id}
+
+    response = TestClient(app).get('/items/42')
+    assert response.status_code == 200
+    assert 'auth;dur=2.000' in response.headers['server-timing']
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{id}",status="200"} 1' in metrics.render()
+    assert current_timings.get() is None
+
+def test_middleware_excludes_background_tasks(monkeypatch):
+    metrics = RequestMetrics()
+    monkeypatch.setattr('dependencies.instrumentation.request_metrics', metrics)
+    app = FastAPI()
+    app.add_middleware(InstrumentationMiddleware)
+
+    @app.post('/login')
+    async def login(background_tasks: BackgroundTasks):
+        #Exécuté après l'envoi de la réponse
+        background_tasks.add_task(add_timing, 'hash', 5.0)
+        return {}
+
+    response = TestClient(app).post('/login')
+    assert response.status_code == 200
+    rendered = metrics.render()
+    assert 'http_request_hash_seconds_sum{method="POST",route="/login"} 0.0' in rendered
+    assert 'http_request_duration_seconds_count{method="POST",route="/login",status="200"} 1' in rendered
\ No newline at end of file
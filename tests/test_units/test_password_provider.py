@@ -0,0 +1,25 @@
+from providers.password_provider import BcryptHasher, ScryptHasher, check_password, identify_hasher
+
+
+def test_bcrypt_needs_rehash_on_cost_change():
+    hashed_password = BcryptHasher(rounds = 4).hash('12345678')
+    assert BcryptHasher(rounds = 4).verify('12345678', hashed_password)
+    assert not BcryptHasher(rounds = 4).needs_rehash(hashed_password)
+    assert BcryptHasher(rounds = 5).needs_rehash(hashed_password)
+
+def test_scrypt_hash_and_verify():
+    hasher = ScryptHasher(log_n = 10, r = 8, p = 1)
+    hashed_password = hasher.hash('12345678')
+    assert hashed_password.startswith('$scrypt$ln=10,r=8,p=1$')
+    assert hasher.verify('12345678', hashed_password)
+    assert not hasher.verify('87654321', hashed_password)
+    assert not hasher.needs_rehash(hashed_password)
+    assert ScryptHasher(log_n = 11).needs_rehash(hashed_password)
+
+def test_check_password_identifies_algorithm():
+    scrypt_password = ScryptHasher(log_n = 10).hash('12345678')
+    bcrypt_password = BcryptHasher(rounds = 4).hash('12345678')
+    assert identify_hasher(scrypt_password) is ScryptHasher
+    assert identify_hasher(bcrypt_password) is BcryptHasher
+    assert check_password('12345678', scrypt_password)
+    assert check_password('12345678', bcrypt_password)
\ No newline at end of file
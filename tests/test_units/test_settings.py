@@ -0,0 +1,50 @@
+import pytest
+from pydantic import ValidationError
+
+from config.settings import Settings, get_settings
+
+
+def test_defaults():
+    settings = Settings.from_environ({})
+    assert settings.database_name == 'api_concours'
+    assert settings.mongo_max_pool_size == 100
+    assert settings.mongo_max_idle_time_ms is None
+
+def test_from_environ_parses_values():
+    settings = Settings.from_environ({
+        'MONGO_MAX_POOL_SIZE': '50',
+        'MONGO_WAIT_QUEUE_TIMEOUT_MS': '2000',
+        #Une valeur vide vaut une variable absente
+        'MONGO_MAX_IDLE_TIME_MS': '',
+    })
+    assert settings.mongo_max_pool_size == 50
+    assert settings.mongo_wait_queue_timeout_ms == 2000
+    assert settings.mongo_max_idle_time_ms is None
+
+def test_database_uri_by_environment():
+    environ = {'DATABASE_URI_PROD': 'mongodb://prod', 'DATABASE_URI_TEST': 'mongodb://test'}
+    assert Settings.from_environ(environ).database_uri == 'mongodb://test'
+    assert Settings.from_environ({**environ, 'ENV': 'production'}).database_uri == 'mongodb://prod'
+
+def test_get_settings_is_cached():
+    assert get_settings() is get_settings()
+
+def test_invalid_values_are_rejected():
+    with pytest.raises(ValidationError):
+        Settings.from_environ({'AUTH_MODE': 'session'})
+    with pytest.raises(ValidationError):
+        Settings.from_environ({'BCRYPT_ROUNDS': '2'})
+    with pytest.raises(ValidationError):
+        Settings.from_environ({'ALGORITHM': 'your_algo'})
+
+def test_jwt_keys_are_prepared_once():
+    settings = Settings.from_environ({'SECRET_KEY': 'test_secret_key', 'ALGORITHM': 'HS256'})
+    assert settings.jwt_keys is settings.jwt_keys
+    assert settings.jwt_keys.algorithm == 'HS256'
+    assert settings.jwt_keys.signing_key == b'test_secret_key'
+    #La clé secrète n'apparaît pas dans la représentation des paramètres
+    assert 'test_secret_key' not in repr(settings)
+
+def test_jwt_keys_require_a_secret_key():
+    with pytest.raises(ValueError):
+        Settings.from_environ({'ALGORITHM': 'HS256'}).jwt_keys
\ No newline at end of file
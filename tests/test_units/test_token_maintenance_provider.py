@@ -0,0 +1,25 @@
+import asyncio
+import datetime
+from mongomock_motor import AsyncMongoMockClient
+
+from providers.token_maintenance_provider import LEASE_COLLECTION, LEASE_ID, TokenMaintenance
+
+
+def test_only_lease_holder_runs_maintenance():
+    db = AsyncMongoMockClient()['api_test']
+    first, second = TokenMaintenance(interval = 60), TokenMaintenance(interval = 60)
+    assert asyncio.run(first.acquire_lease(db))
+    assert not asyncio.run(second.acquire_lease(db))
+    #Le détenteur prolonge son bail
+    assert asyncio.run(first.acquire_lease(db))
+
+def test_expired_lease_is_taken_over():
+    db = AsyncMongoMockClient()['api_test']
+    first, second = TokenMaintenance(interval = 60), TokenMaintenance(interval = 60)
+    assert asyncio.run(first.acquire_lease(db))
+    asyncio.run(db.get_collection(LEASE_COLLECTION).update_one(
+        {'_id': LEASE_ID},
+        {'$set': {'expires_at': datetime.datetime(2000, 1, 1)}}
+    ))
+    assert asyncio.run(second.acquire_lease(db))
+    assert not asyncio.run(first.acquire_lease(db))
\ No newline at end of file